@@ -32,6 +32,8 @@ class ClipResponse(BaseModel):
     published_at: Optional[datetime]
     published_platform: Optional[str]
     credits_used: int
+    platform: Optional[str] = None
+    parent_clip_id: Optional[int] = None
     created_at: datetime
 
     class Config:
@@ -47,6 +49,10 @@ class ClipApprovalRequest(BaseModel):
     approved: bool
 
 
+class ClipVariantRequest(BaseModel):
+    platform: str  # tiktok, instagram, youtube_shorts
+
+
 @router.get("/", response_model=List[ClipResponse])
 def list_clips(
     skip: int = 0,
@@ -58,7 +64,11 @@ def list_clips(
     """List all clips for the current user"""
     user = get_current_user_from_token(authorization, db)
     
-    query = db.query(GeneratedClip).join(Project).filter(Project.user_id == user.id)
+    # Varian platform ikut klip utamanya (lihat /{clip_id}/variants)
+    query = db.query(GeneratedClip).join(Project).filter(
+        Project.user_id == user.id,
+        GeneratedClip.parent_clip_id == None
+    )
     
     if approved_only:
         query = query.filter(GeneratedClip.is_approved == True)
@@ -87,6 +97,49 @@ def get_clip(
     return clip
 
 
+@router.get("/{clip_id}/variants", response_model=List[ClipResponse])
+def list_clip_variants(
+    clip_id: int,
+    authorization: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """List per-platform renditions (tiktok, instagram, youtube_shorts) of a clip"""
+    user = get_current_user_from_token(authorization, db)
+    
+    return db.query(GeneratedClip).join(Project).filter(
+        GeneratedClip.parent_clip_id == clip_id,
+        Project.user_id == user.id
+    ).all()
+
+
+@router.post("/{clip_id}/variants")
+def create_clip_variant(
+    clip_id: int,
+    request: ClipVariantRequest,
+    authorization: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Encode a rendition of a clip for one platform (fixed 1080x1920, platform bitrate & duration limit)"""
+    user = get_current_user_from_token(authorization, db)
+    
+    clip = db.query(GeneratedClip).join(Project).filter(
+        GeneratedClip.id == clip_id,
+        Project.user_id == user.id,
+        GeneratedClip.parent_clip_id == None
+    ).first()
+    
+    if not clip:
+        raise HTTPException(status_code=404, detail="Clip not found")
+    
+    from app.services.render import PROFILES
+    if request.platform not in PROFILES:
+        raise HTTPException(status_code=400, detail=f"Platform {request.platform} not supported")
+    
+    from app.tasks.pipeline import render_variant_task
+    task = render_variant_task.delay(clip.id, request.platform)
+    return {"task_id": task.id, "status": "variant_started", "platform": request.platform}
+
+
 @router.patch("/{clip_id}", response_model=ClipResponse)
 def update_clip(
     clip_id: int,
@@ -165,6 +218,7 @@ def delete_clip(
     if clip.published_at:
         raise HTTPException(status_code=400, detail="Cannot delete published clips")
     
+    db.query(GeneratedClip).filter(GeneratedClip.parent_clip_id == clip.id).delete()
     db.delete(clip)
     db.commit()
     
@@ -182,7 +236,8 @@ def get_pending_count(
     count = db.query(GeneratedClip).join(Project).filter(
         Project.user_id == user.id,
         GeneratedClip.is_approved == False,
-        GeneratedClip.published_at == None
+        GeneratedClip.published_at == None,
+        GeneratedClip.parent_clip_id == None
     ).count()
     
     return {"pending_count": count}
@@ -321,6 +321,14 @@ async def publish_clip(
     if not channel:
         raise HTTPException(status_code=400, detail=f"{request.platform} not connected")
     
+    # Pakai varian yang sudah di-encode untuk platform ini (kalau ada), bukan encode ulang saat publish
+    variant = db.query(GeneratedClip).filter(
+        GeneratedClip.parent_clip_id == clip.id,
+        GeneratedClip.platform == request.platform
+    ).first()
+    if variant:
+        clip = variant
+    
     # Platform-specific publishing
     if request.platform == "tiktok":
         result = await _publish_to_tiktok(clip, channel, request.caption)
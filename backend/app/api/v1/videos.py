@@ -43,6 +43,8 @@ class CandidateSchema(BaseModel):
     is_rendered: bool
     # Field Baru
     draft_video_path: Optional[str] = None
+    preview_video_path: Optional[str] = None
+    draft_status: Optional[str] = None
     transcript_data: Optional[List[dict]] = None # List of objects
     
     class Config: from_attributes = True
@@ -58,6 +60,14 @@ class ProjectSchema(BaseModel):
 
     class Config: from_attributes = True
 
+class RenderRequest(BaseModel):
+    # Varian platform; None = platform channel sosial user yang terhubung
+    platforms: Optional[List[str]] = None
+
+class RenderProjectRequest(BaseModel):
+    candidate_ids: List[int]
+    platforms: Optional[List[str]] = None
+
 class TaskResponse(BaseModel):
     task_id: str
     status: str
@@ -84,12 +94,28 @@ def create_video_task(
     return {"task_id": task.id, "status": "analysis_started"}
 
 @router.post("/render/{candidate_id}")
-def render_candidate(candidate_id: int):
+def render_candidate(candidate_id: int, request: Optional[RenderRequest] = None):
     """Trigger rendering untuk satu kandidat spesifik."""
     from app.tasks.pipeline import render_single_clip_task
-    task = render_single_clip_task.delay(candidate_id)
+    task = render_single_clip_task.delay(candidate_id, platforms=request.platforms if request else None)
     return {"task_id": task.id, "status": "rendering_started"}
 
+@router.post("/render_project/{project_id}")
+def render_project(project_id: str, request: RenderProjectRequest):
+    """Render banyak kandidat satu project sekaligus (decode source dibagi antar klip)."""
+    if not request.candidate_ids:
+        raise HTTPException(status_code=400, detail="candidate_ids is empty")
+    from app.tasks.pipeline import render_project_task
+    task = render_project_task.delay(project_id, request.candidate_ids, platforms=request.platforms)
+    return {"task_id": task.id, "status": "rendering_started", "count": len(request.candidate_ids)}
+
+@router.post("/export_horizontal/{candidate_id}")
+def export_horizontal(candidate_id: int):
+    """Export kandidat dalam aspek asli tanpa re-encode (stream-copy dari keyframe)."""
+    from app.tasks.pipeline import export_horizontal_task
+    task = export_horizontal_task.delay(candidate_id)
+    return {"task_id": task.id, "status": "export_started"}
+
 @router.get("/", response_model=List[ProjectSchema])
 def list_projects(
     skip: int = 0, 
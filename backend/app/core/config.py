@@ -0,0 +1,137 @@
+"""
+Konfigurasi pipeline media (per deployment).
+Semua nilai diambil dari environment variable supaya bisa diatur lewat docker-compose.
+"""
+import os
+
+# --- SOURCE FETCH ---
+# "full"     = download video utuh (<=1080p) ke source.mp4 (perilaku lama)
+# "sections" = analisa pakai fetch murah (low-res), hi-res diambil per window kandidat
+SOURCE_FETCH_MODE = os.environ.get("SOURCE_FETCH_MODE", "full")
+
+SOURCE_FORMAT = os.environ.get(
+    "SOURCE_FORMAT",
+    "bestvideo[height<=1080][ext=mp4][vcodec^=avc1]+bestaudio[ext=m4a]/best[ext=mp4]/best",
+)
+ANALYSIS_FORMAT = os.environ.get(
+    "ANALYSIS_FORMAT",
+    "bestvideo[height<=360][ext=mp4]+bestaudio[ext=m4a]/best[height<=360][ext=mp4]/worst[ext=mp4]/worst",
+)
+
+# Padding (detik) di kiri-kanan window kandidat saat download section,
+# supaya cut stream-copy yang mendarat di keyframe tetap menutup seluruh window.
+SECTION_PADDING_SECONDS = float(os.environ.get("SECTION_PADDING_SECONDS", "3"))
+
+# --- ANALYSIS PROXY (sebelum upload ke Gemini) ---
+# "off"    = upload file source apa adanya
+# "video"  = rendition kecil: resolusi rendah, fps rendah, bitrate rendah
+# "sparse" = audio + keyframe jarang (1 frame tiap beberapa detik)
+ANALYSIS_PROXY_MODE = os.environ.get("ANALYSIS_PROXY_MODE", "video")
+ANALYSIS_PROXY_HEIGHT = int(os.environ.get("ANALYSIS_PROXY_HEIGHT", "360"))
+ANALYSIS_PROXY_FPS = float(os.environ.get("ANALYSIS_PROXY_FPS", "1"))
+ANALYSIS_PROXY_SPARSE_FPS = float(os.environ.get("ANALYSIS_PROXY_SPARSE_FPS", "0.2"))
+ANALYSIS_PROXY_VIDEO_BITRATE = os.environ.get("ANALYSIS_PROXY_VIDEO_BITRATE", "150k")
+ANALYSIS_PROXY_AUDIO_BITRATE = os.environ.get("ANALYSIS_PROXY_AUDIO_BITRATE", "32k")
+
+# --- GEMINI CACHE (Redis) ---
+REDIS_URL = os.environ.get("REDIS_URL", os.environ.get("CELERY_BROKER_URL", "redis://redis:6379/0"))
+GEMINI_CACHE_URL = os.environ.get("GEMINI_CACHE_URL", REDIS_URL)
+# File di Gemini Files API expire 48 jam setelah upload; simpan handle sedikit lebih pendek
+GEMINI_FILE_TTL_SECONDS = int(os.environ.get("GEMINI_FILE_TTL_SECONDS", str(46 * 3600)))
+ANALYSIS_CACHE_TTL_SECONDS = int(os.environ.get("ANALYSIS_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# --- WINDOWED ANALYSIS (map-reduce untuk video panjang) ---
+# Video lebih panjang dari threshold dipecah jadi window yang overlap.
+# Overlap >= durasi klip maksimum (180s) supaya tiap klip utuh di minimal satu window.
+ANALYSIS_WINDOW_THRESHOLD_SECONDS = int(os.environ.get("ANALYSIS_WINDOW_THRESHOLD_SECONDS", str(45 * 60)))
+ANALYSIS_WINDOW_SECONDS = int(os.environ.get("ANALYSIS_WINDOW_SECONDS", str(20 * 60)))
+ANALYSIS_WINDOW_OVERLAP_SECONDS = int(os.environ.get("ANALYSIS_WINDOW_OVERLAP_SECONDS", "200"))
+ANALYSIS_MAX_INFLIGHT = int(os.environ.get("ANALYSIS_MAX_INFLIGHT", "4"))
+ANALYSIS_MAX_CLIPS = int(os.environ.get("ANALYSIS_MAX_CLIPS", "30"))
+
+# --- GEMINI PROCESSING WAIT ---
+# Menunggu state PROCESSING dilakukan dengan re-enqueue task (countdown), bukan time.sleep
+ANALYSIS_POLL_INTERVAL_SECONDS = int(os.environ.get("ANALYSIS_POLL_INTERVAL_SECONDS", "5"))
+ANALYSIS_PROCESSING_TIMEOUT_SECONDS = int(os.environ.get("ANALYSIS_PROCESSING_TIMEOUT_SECONDS", "600"))
+
+# --- TRANSCRIPTION WORKER ---
+# Whisper hanya di-load di worker queue "transcribe" (WHISPER_PRELOAD=1 di container itu)
+# Engine: "whisper" (openai-whisper) atau "faster-whisper" (CTranslate2 int8, CPU-only friendly)
+TRANSCRIBE_ENGINE = os.environ.get("TRANSCRIBE_ENGINE", "whisper")
+TRANSCRIBE_COMPUTE_TYPE = os.environ.get("TRANSCRIBE_COMPUTE_TYPE", "int8")
+WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "small")
+WHISPER_THREADS = int(os.environ.get("WHISPER_THREADS", "0"))  # 0 = default torch
+WHISPER_PRELOAD = os.environ.get("WHISPER_PRELOAD", "0") == "1"
+# Beam size sama untuk semua engine (1 = greedy, default openai-whisper lama), supaya
+# ganti engine tidak diam-diam ganti strategi decoding
+TRANSCRIBE_BEAM_SIZE = int(os.environ.get("TRANSCRIBE_BEAM_SIZE", "1"))
+TRANSCRIBE_QUEUE = os.environ.get("TRANSCRIBE_QUEUE", "transcribe")
+# Queue interaktif (batch kandidat editor) di worker terpisah, supaya tidak
+# antri di belakang transkripsi full-source yang bisa berjalan puluhan menit
+TRANSCRIBE_BATCH_QUEUE = os.environ.get("TRANSCRIBE_BATCH_QUEUE", "transcribe_interactive")
+
+# Batch transkripsi kandidat: tunggu sebentar (linger) supaya request editor yang
+# datang berdekatan di-decode model dalam satu batched pass (clip <= 30s, independen)
+TRANSCRIBE_BATCH_LINGER_SECONDS = float(os.environ.get("TRANSCRIBE_BATCH_LINGER_SECONDS", "3"))
+TRANSCRIBE_BATCH_SIZE = int(os.environ.get("TRANSCRIBE_BATCH_SIZE", "8"))  # clip 30s per forward pass
+TRANSCRIBE_BATCH_MAX_SECONDS = float(os.environ.get("TRANSCRIBE_BATCH_MAX_SECONDS", "900"))  # audio per task pass (memori)
+TRANSCRIBE_BATCH_MAX_ATTEMPTS = int(os.environ.get("TRANSCRIBE_BATCH_MAX_ATTEMPTS", "3"))
+TRANSCRIBE_BATCH_GAP_SECONDS = float(os.environ.get("TRANSCRIBE_BATCH_GAP_SECONDS", "1.0"))
+
+# VAD sebelum Whisper: hanya region bicara yang ditranskripsi
+TRANSCRIBE_VAD = os.environ.get("TRANSCRIBE_VAD", "1") == "1"
+VAD_ENERGY_MARGIN_DB = float(os.environ.get("VAD_ENERGY_MARGIN_DB", "12"))
+VAD_MIN_DB = float(os.environ.get("VAD_MIN_DB", "-50"))
+VAD_BAND_RATIO = float(os.environ.get("VAD_BAND_RATIO", "0.45"))
+# Region lolos < fraksi ini dari input (audio tidak hening) = VAD dianggap meleset, transkrip semua
+VAD_MIN_COVERAGE = float(os.environ.get("VAD_MIN_COVERAGE", "0.05"))
+
+# --- FACE SCAN ---
+# Frame untuk deteksi wajah di-decode sekuensial oleh ffmpeg (tanpa seek per sampel)
+# dan langsung di-scale kecil + RGB sebelum masuk MediaPipe
+FACE_SCAN_WIDTH = int(os.environ.get("FACE_SCAN_WIDTH", "480"))
+FACE_SCAN_SAMPLES = int(os.environ.get("FACE_SCAN_SAMPLES", "10"))
+# Face track seluruh source (sekali per source), fps rendah
+FACE_TRACK_FPS = float(os.environ.get("FACE_TRACK_FPS", "1"))
+
+# --- REFRAME ---
+# "static"  = satu posisi crop per klip (rata-rata wajah)
+# "dynamic" = deteksi pergantian shot + lintasan crop halus per shot (sendcmd, tetap satu encode)
+REFRAME_MODE = os.environ.get("REFRAME_MODE", "dynamic")
+REFRAME_SCENE_THRESHOLD = float(os.environ.get("REFRAME_SCENE_THRESHOLD", "0.35"))
+REFRAME_SMOOTH_SECONDS = float(os.environ.get("REFRAME_SMOOTH_SECONDS", "1.5"))
+REFRAME_STEP_SECONDS = float(os.environ.get("REFRAME_STEP_SECONDS", "0.1"))
+
+# --- RENDER VARIANTS ---
+# Varian platform (lihat PROFILES di app/services/render.py) di-encode dari decode
+# yang sama saat render final. Default per request: platform channel sosial user
+# yang terhubung (atau `platforms` di request render). Env ini = platform tambahan
+# yang selalu ikut, mis. "tiktok,instagram,youtube_shorts".
+RENDER_VARIANTS = [p for p in os.environ.get("RENDER_VARIANTS", "").split(",") if p]
+
+# Batch render satu project: kandidat berdekatan di timeline di-render dari satu decode
+# (satu proses ffmpeg per batch). Jarak antar kandidat > GAP memulai batch baru.
+RENDER_BATCH_GAP_SECONDS = float(os.environ.get("RENDER_BATCH_GAP_SECONDS", "60"))
+RENDER_BATCH_MAX_CLIPS = int(os.environ.get("RENDER_BATCH_MAX_CLIPS", "6"))
+
+# --- SUBTITLE ---
+# "ass" = baris pendek dengan highlight karaoke per kata (\k), "srt" = satu cue per kata (lama)
+SUBTITLE_FORMAT = os.environ.get("SUBTITLE_FORMAT", "ass")
+SUBTITLE_MAX_WORDS = int(os.environ.get("SUBTITLE_MAX_WORDS", "4"))
+SUBTITLE_MAX_LINE_SECONDS = float(os.environ.get("SUBTITLE_MAX_LINE_SECONDS", "2.5"))
+SUBTITLE_MAX_GAP_SECONDS = float(os.environ.get("SUBTITLE_MAX_GAP_SECONDS", "0.6"))
+
+# Encode paralel per segmen (GOP-aligned) untuk klip panjang: "auto" = aktif kalau klip
+# >= MIN_SECONDS dan core menganggur cukup (load average), "off" = selalu single-pass
+RENDER_PARALLEL_MODE = os.environ.get("RENDER_PARALLEL_MODE", "auto")
+RENDER_PARALLEL_MIN_SECONDS = float(os.environ.get("RENDER_PARALLEL_MIN_SECONDS", "90"))
+RENDER_SEGMENT_SECONDS = float(os.environ.get("RENDER_SEGMENT_SECONDS", "30"))
+RENDER_THREADS_PER_SEGMENT = int(os.environ.get("RENDER_THREADS_PER_SEGMENT", "2"))
+RENDER_PARALLEL_MAX_WORKERS = int(os.environ.get("RENDER_PARALLEL_MAX_WORKERS", "0"))  # 0 = sebanyak core bebas
+
+# --- EDITOR DRAFT ---
+# Tier 1: preview 9:16 kecil (faststart) supaya editor cepat terbuka.
+# Tier 2: draft full-quality dikirim dengan priority rendah (Redis: 0 = tertinggi, 9 = terendah)
+DRAFT_PREVIEW_HEIGHT = int(os.environ.get("DRAFT_PREVIEW_HEIGHT", "640"))  # 360x640
+DRAFT_PREVIEW_VIDEO_BITRATE = os.environ.get("DRAFT_PREVIEW_VIDEO_BITRATE", "500k")
+DRAFT_FULL_PRIORITY = int(os.environ.get("DRAFT_FULL_PRIORITY", "9"))
@@ -54,6 +54,8 @@ class Project(Base):
     status = Column(String, default="processing") 
     title = Column(String, nullable=True) 
     thumbnail_url = Column(String, nullable=True)
+    # Key folder di source store (downloads/sources/{key}), dipakai bersama antar project
+    source_key = Column(String, nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     user = relationship("User", back_populates="projects")
@@ -71,6 +73,10 @@ class GeneratedClip(Base):
     published_at = Column(DateTime(timezone=True), nullable=True)
     published_platform = Column(String, nullable=True)
     credits_used = Column(Integer, default=1)
+    # Varian per platform (render_profiles): platform=None adalah klip utama,
+    # varian menunjuk ke klip utamanya lewat parent_clip_id
+    platform = Column(String, nullable=True)
+    parent_clip_id = Column(Integer, ForeignKey("generated_clips.id"), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     project = relationship("Project", back_populates="clips")
 
@@ -112,6 +118,10 @@ class ClipCandidate(Base):
     # --- KOLOM BARU UNTUK EDITOR ---
     # Menyimpan video 9:16 polos (tanpa teks) untuk preview di editor
     draft_video_path = Column(String, nullable=True)
+    # Preview 360p (cepat, untuk membuka editor) sebelum draft full-quality selesai
+    preview_video_path = Column(String, nullable=True)
+    # pending -> preview_ready -> ready (draft full-quality ada) / failed
+    draft_status = Column(String, default="pending")
     # Menyimpan data JSON Whisper (word-level timestamps) agar bisa diedit
     transcript_data = Column(JSON, nullable=True)
     
@@ -0,0 +1,108 @@
+"""
+Loader audio tanpa file temp: ffmpeg decode langsung ke PCM 16 kHz mono di
+stdout, dibaca jadi array NumPy float32 (format yang diterima Whisper).
+"""
+import os
+import fcntl
+import subprocess
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def load_pcm(media_path, start=None, end=None, sr=SAMPLE_RATE):
+    """
+    Decode audio dari `media_path` (boleh langsung source.mp4) ke float32 [-1, 1].
+    Kalau start/end diisi, ffmpeg seek langsung ke window itu (tanpa cut perantara).
+    """
+    command = ['ffmpeg', '-nostdin', '-v', 'error']
+    if start is not None:
+        command += ['-ss', str(start)]
+    if end is not None:
+        command += ['-t', str(end - (start or 0))]
+    command += ['-i', media_path, '-vn', '-f', 's16le', '-acodec', 'pcm_s16le', '-ac', '1', '-ar', str(sr), '-']
+
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise Exception(f"FFmpeg audio decode gagal: {result.stderr.decode('utf8')[-300:]}")
+
+    return np.frombuffer(result.stdout, np.int16).astype(np.float32) / 32768.0
+
+
+# --- PCM CACHE PER SOURCE (memory-mapped) ---
+# Audio source di-decode SEKALI ke int16 mentah di folder source. Semua tahap
+# (transkripsi source, batch kandidat, analisa audio lain) mengambil slice
+# lewat np.memmap, jadi RSS tetap kecil walau source-nya berjam-jam.
+PCM_FILENAME = "audio_16k_s16le.pcm"
+
+
+def pcm_cache_path(source_dir):
+    return f"{source_dir}/{PCM_FILENAME}"
+
+
+def ensure_pcm_cache(source_dir, media_path):
+    """Decode seluruh audio source ke file PCM (streaming oleh ffmpeg, tidak lewat RAM Python)."""
+    path = pcm_cache_path(source_dir)
+    if os.path.exists(path):
+        return path
+
+    with open(f"{source_dir}/.pcm.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            if os.path.exists(path):
+                return path
+            print(f"   🔊 Decode audio source ke PCM cache ({source_dir})...")
+            temp_path = f"{path}.tmp"
+            subprocess.run(
+                ['ffmpeg', '-nostdin', '-v', 'error', '-y', '-i', media_path, '-vn',
+                 '-f', 's16le', '-acodec', 'pcm_s16le', '-ac', '1', '-ar', str(SAMPLE_RATE), temp_path],
+                check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+            )
+            os.replace(temp_path, path)
+            return path
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def open_pcm(source_dir):
+    """np.memmap int16 read-only atas PCM cache (None kalau belum dibuat)."""
+    path = pcm_cache_path(source_dir)
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    return np.memmap(path, dtype=np.int16, mode='r')
+
+
+def slice_pcm(pcm, start, end):
+    """View zero-copy int16 untuk window [start, end] detik."""
+    lo = max(0, int(start * SAMPLE_RATE))
+    hi = min(len(pcm), int(end * SAMPLE_RATE))
+    return pcm[lo:hi]
+
+
+def to_float(samples):
+    """int16 -> float32 [-1, 1] (satu-satunya copy, hanya sebesar window yang dipakai)."""
+    return samples.astype(np.float32) / 32768.0
+
+
+def chunk_bounds(pcm, chunk_seconds=600, search_seconds=10, frame_seconds=0.25):
+    """
+    Bagi timeline jadi chunk ~chunk_seconds. Sambungan chunk digeser ke frame paling
+    sepi di `search_seconds` terakhir, supaya tidak memotong di tengah kata.
+    Return list (start_sample, end_sample).
+    """
+    total = len(pcm)
+    chunk, search, frame = (int(x * SAMPLE_RATE) for x in (chunk_seconds, search_seconds, frame_seconds))
+
+    bounds, lo = [], 0
+    while lo < total:
+        hi = lo + chunk
+        if hi >= total:
+            bounds.append((lo, total))
+            break
+        region = pcm[hi - search:hi]
+        n_frames = len(region) // frame
+        energy = np.abs(region[:n_frames * frame].astype(np.int32)).reshape(n_frames, frame).mean(axis=1)
+        hi = hi - search + int(np.argmin(energy)) * frame + frame // 2
+        bounds.append((lo, hi))
+        lo = hi
+    return bounds
@@ -0,0 +1,175 @@
+"""
+Deteksi posisi wajah untuk smart crop.
+
+Frame diambil lewat satu proses ffmpeg yang decode SEKUENSIAL, sekaligus
+menurunkan fps (hanya frame sampel yang keluar) dan resolusi, lalu mengirim
+RGB mentah lewat pipe. Tidak ada seek per sampel, tidak ada konversi BGR->RGB
+di Python. Instance FaceDetection MediaPipe dipakai ulang per proses worker.
+"""
+import os
+import fcntl
+import subprocess
+import numpy as np
+import mediapipe as mp
+
+from app.core import config
+from app.services import sources, reframe
+
+_face_detector = None
+
+
+def face_detector():
+    global _face_detector
+    if _face_detector is None:
+        _face_detector = mp.solutions.face_detection.FaceDetection(model_selection=1, min_detection_confidence=0.4)
+    return _face_detector
+
+
+def sample_frames(video_path, fps, start=None, duration=None, width=None, probe=None, scene_file=None):
+    """
+    Yield (timestamp, frame_rgb) dengan timestamp relatif ke `start`.
+    `probe` (hasil sources.probe_video) boleh diisi supaya tidak ffprobe ulang.
+    `scene_file`: tulis juga skor cut shot (filter scene) dari decode yang sama
+    ke file ini (format metadata=print, lihat reframe.parse_scene_times).
+    """
+    probe = probe or sources.probe_video(video_path)
+    width = min(width or config.FACE_SCAN_WIDTH, probe['width'])
+    height = int(round(probe['height'] * width / probe['width'] / 2)) * 2
+    frame_bytes = width * height * 3
+
+    command = ['ffmpeg', '-nostdin', '-v', 'error']
+    if start is not None:
+        command += ['-ss', str(start)]
+    if duration is not None:
+        command += ['-t', str(duration)]
+    command += ['-i', video_path, '-an']
+    if scene_file:
+        # Satu decode, dua cabang: frame sampel ke pipe, deteksi shot (full fps, low-res) ke file
+        command += ['-filter_complex',
+                    f"[0:v]split[f][s];[f]fps={fps},scale={width}:{height}[out];"
+                    f"[s]scale=160:-2,select='gt(scene,{config.REFRAME_SCENE_THRESHOLD})',"
+                    f"metadata=print:file='{os.path.abspath(scene_file)}',nullsink",
+                    '-map', '[out]']
+    else:
+        command += ['-vf', f"fps={fps},scale={width}:{height}"]
+    command += ['-f', 'rawvideo', '-pix_fmt', 'rgb24', '-']
+
+    proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        index = 0
+        while True:
+            buf = proc.stdout.read(frame_bytes)
+            if len(buf) < frame_bytes:
+                break
+            yield index / fps, np.frombuffer(buf, np.uint8).reshape(height, width, 3)
+            index += 1
+    finally:
+        proc.stdout.close()
+        proc.kill()
+        proc.wait()
+
+
+def detect_center(frame_rgb):
+    """Return (center_x relatif 0..1, confidence) wajah paling yakin, atau None."""
+    results = face_detector().process(frame_rgb)
+    if not results.detections:
+        return None
+    best = max(results.detections, key=lambda d: d.score[0])
+    bbox = best.location_data.relative_bounding_box
+    return bbox.xmin + (bbox.width / 2), float(best.score[0])
+
+
+def scan_face_average(video_path, start=None, duration=None, samples=None, probe=None):
+    """
+    Rata-rata posisi X wajah (pixel, pada resolusi asli) di window video.
+    Biaya sebanding jumlah sampel, bukan jarak seek.
+    """
+    probe = probe or sources.probe_video(video_path)
+    samples = samples or config.FACE_SCAN_SAMPLES
+    span = duration or max(0.0, probe['duration'] - (start or 0))
+    fps = samples / span if span > 0 else 1
+
+    detected = [c for _, frame in sample_frames(video_path, fps, start, duration, probe=probe)
+                if (c := detect_center(frame)) is not None]
+    center = sum(x for x, _ in detected) / len(detected) if detected else 0.5
+    return center * probe['width']
+
+
+# --- FACE TRACK SELURUH SOURCE ---
+# Satu scan low-fps atas seluruh source, disimpan di folder source sebagai
+# array float32 (N, 3): [timestamp_detik, center_x_relatif (NaN = tidak ada wajah), confidence].
+# Semua kandidat dari source yang sama tinggal lookup window di array ini.
+# Cut shot seluruh source (float64 (N,), detik, urut) dideteksi dari decode yang
+# sama dan disimpan di sebelahnya untuk reframe dinamis.
+FACE_TRACK_FILENAME = "faces.npy"
+SHOTS_FILENAME = "shots.npy"
+
+
+def face_track_path(source_dir):
+    return f"{source_dir}/{FACE_TRACK_FILENAME}"
+
+
+def shots_path(source_dir):
+    return f"{source_dir}/{SHOTS_FILENAME}"
+
+
+def build_face_track(source_dir, media_path, fps=None):
+    path = face_track_path(source_dir)
+    if os.path.exists(path) and os.path.exists(shots_path(source_dir)):
+        return path
+
+    with open(f"{source_dir}/.faces.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            if os.path.exists(path) and os.path.exists(shots_path(source_dir)):
+                return path
+            fps = fps or config.FACE_TRACK_FPS
+            print(f"   👁️ Face track + shot seluruh source ({source_dir}, {fps} fps)...")
+            scene_file = f"{source_dir}/.scenes.txt"
+            rows = []
+            for t, frame in sample_frames(media_path, fps, scene_file=scene_file):
+                hit = detect_center(frame)
+                rows.append((t, hit[0], hit[1]) if hit else (t, np.nan, 0.0))
+
+            scene_text = ""
+            if os.path.exists(scene_file):
+                with open(scene_file) as f:
+                    scene_text = f.read()
+                os.remove(scene_file)
+            shots = np.array(reframe.parse_scene_times(scene_text), dtype=np.float64)
+            temp_path = f"{shots_path(source_dir)}.tmp.npy"
+            np.save(temp_path, shots)
+            os.replace(temp_path, shots_path(source_dir))
+
+            track = np.array(rows, dtype=np.float32).reshape(-1, 3)
+            temp_path = f"{path}.tmp.npy"
+            np.save(temp_path, track)
+            os.replace(temp_path, path)
+            print(f"   ✅ Face track: {len(track)} sampel, {int(np.sum(track[:, 2] > 0))} dengan wajah, {len(shots)} cut shot")
+            return path
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_face_track(source_dir):
+    path = face_track_path(source_dir)
+    if not os.path.exists(path):
+        return None
+    return np.load(path, mmap_mode='r')
+
+
+def load_shots(source_dir):
+    path = shots_path(source_dir)
+    if not os.path.exists(path):
+        return None
+    return np.load(path, mmap_mode='r')
+
+
+def window_center(track, start, end):
+    """Rata-rata center_x relatif (dibobot confidence) di [start, end], None kalau tidak ada wajah."""
+    lo, hi = np.searchsorted(track[:, 0], [start, end])
+    window = track[lo:hi]
+    window = window[window[:, 2] > 0]
+    if len(window) == 0:
+        return None
+    return float(np.average(window[:, 1], weights=window[:, 2]))
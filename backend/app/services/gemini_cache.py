@@ -0,0 +1,88 @@
+"""
+Cache Redis untuk analisa Gemini, di-key dengan hash konten file yang di-upload.
+
+- gemini:file:{hash}                              -> nama file di Gemini Files API (TTL ~ expiry server)
+- gemini:result:{hash}:{prompt_version}:{target}  -> JSON list kandidat hasil parse
+
+Redis yang dipakai sama dengan broker Celery. Kalau Redis bermasalah, cache
+dianggap MISS (analisa tetap jalan, hanya tidak hemat).
+"""
+import os
+import json
+import hashlib
+import redis
+
+from app.core import config
+
+_redis_client = None
+
+
+def _client():
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(config.GEMINI_CACHE_URL)
+    return _redis_client
+
+
+def content_hash(path):
+    """SHA-256 isi file. Disimpan di sidecar {path}.sha256 supaya tidak hashing ulang."""
+    stat = os.stat(path)
+    sidecar = f"{path}.sha256"
+    stamp = f"{stat.st_size}:{int(stat.st_mtime)}"
+    if os.path.exists(sidecar):
+        with open(sidecar) as f:
+            saved_stamp, _, digest = f.read().strip().partition(" ")
+        if saved_stamp == stamp and digest:
+            return digest
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with open(sidecar, "w") as f:
+        f.write(f"{stamp} {digest}")
+    return digest
+
+
+def get_file_name(digest):
+    try:
+        value = _client().get(f"gemini:file:{digest}")
+        return value.decode() if value else None
+    except redis.RedisError as e:
+        print(f"   ⚠️ Gemini cache error: {e}")
+        return None
+
+
+def set_file_name(digest, file_name, ttl=None):
+    try:
+        _client().set(f"gemini:file:{digest}", file_name, ex=ttl or config.GEMINI_FILE_TTL_SECONDS)
+    except redis.RedisError as e:
+        print(f"   ⚠️ Gemini cache error: {e}")
+
+
+def forget_file_name(digest):
+    try:
+        _client().delete(f"gemini:file:{digest}")
+    except redis.RedisError as e:
+        print(f"   ⚠️ Gemini cache error: {e}")
+
+
+def _result_key(digest, prompt_version, target_clips):
+    return f"gemini:result:{digest}:{prompt_version}:{target_clips}"
+
+
+def get_result(digest, prompt_version, target_clips):
+    try:
+        value = _client().get(_result_key(digest, prompt_version, target_clips))
+        return json.loads(value) if value else None
+    except (redis.RedisError, ValueError) as e:
+        print(f"   ⚠️ Gemini cache error: {e}")
+        return None
+
+
+def set_result(digest, prompt_version, target_clips, candidates):
+    try:
+        _client().set(_result_key(digest, prompt_version, target_clips), json.dumps(candidates), ex=config.ANALYSIS_CACHE_TTL_SECONDS)
+    except redis.RedisError as e:
+        print(f"   ⚠️ Gemini cache error: {e}")
@@ -0,0 +1,111 @@
+"""
+Index keyframe per file media (source.mp4 / analysis.mp4 / section).
+
+Dibangun sekali dengan ffprobe (baca packet saja, tanpa decode) dan disimpan
+di sebelah file-nya:
+    {media}.keyframes.npy   <- float64 (N,) pts_time tiap keyframe video, urut
+    {media}.keyframes.json  <- statistik (jumlah, GOP rata-rata, waktu build)
+
+Dipakai untuk:
+- snap titik seek ke keyframe (cut stream-copy tanpa frame rusak di awal),
+- batas segmen yang GOP-aligned (encode paralel per segmen),
+- fast path stream-copy untuk export horizontal tanpa crop.
+"""
+import os
+import json
+import time
+import fcntl
+import subprocess
+import numpy as np
+
+
+def index_path(media_path):
+    return f"{media_path}.keyframes.npy"
+
+
+def stats_path(media_path):
+    return f"{media_path}.keyframes.json"
+
+
+def build_index(media_path):
+    """Return path index (dibangun kalau belum ada; aman dipanggil paralel)."""
+    path = index_path(media_path)
+    if os.path.exists(path):
+        return path
+
+    with open(f"{media_path}.keyframes.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            if os.path.exists(path):
+                return path
+            started = time.time()
+            result = subprocess.run(
+                ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+                 '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', media_path],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True
+            )
+            times = []
+            for line in result.stdout.decode('utf8', 'ignore').splitlines():
+                pts, _, flags = line.partition(",")
+                if "K" in flags and pts not in ("", "N/A"):
+                    times.append(float(pts))
+
+            index = np.unique(np.array(times, dtype=np.float64))
+            temp_path = f"{path}.tmp.npy"
+            np.save(temp_path, index)
+            os.replace(temp_path, path)
+
+            stats = {
+                'keyframes': int(len(index)),
+                'mean_gop_seconds': round(float(np.mean(np.diff(index))), 3) if len(index) > 1 else None,
+                'build_seconds': round(time.time() - started, 2),
+            }
+            with open(stats_path(media_path), "w") as f:
+                json.dump(stats, f)
+            print(f"   🔑 Keyframe index: {stats['keyframes']} keyframe, GOP ~{stats['mean_gop_seconds']}s ({stats['build_seconds']}s)")
+            return path
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_index(media_path):
+    path = index_path(media_path)
+    if not os.path.exists(path):
+        return None
+    return np.load(path, mmap_mode='r')
+
+
+def load_stats(media_path):
+    path = stats_path(media_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def keyframe_at_or_before(index, t):
+    """Keyframe terakhir <= t (titik seek/stream-copy yang aman)."""
+    k = np.searchsorted(index, t + 1e-3, side='right') - 1
+    return float(index[max(k, 0)]) if len(index) else 0.0
+
+
+def keyframe_at_or_after(index, t):
+    k = np.searchsorted(index, t - 1e-3, side='left')
+    return float(index[k]) if k < len(index) else None
+
+
+def segment_boundaries(index, start, end, target_seconds, min_seconds=None):
+    """
+    Bagi [start, end] jadi segmen ~target_seconds dengan batas di keyframe.
+    Return list (seg_start, seg_end); segmen pertama mulai di `start` dan terakhir
+    berakhir di `end`. Segmen sisa yang lebih pendek dari min_seconds digabung ke sebelumnya.
+    """
+    min_seconds = target_seconds / 2 if min_seconds is None else min_seconds
+    cuts = [start]
+    while True:
+        nxt = keyframe_at_or_after(index, cuts[-1] + target_seconds)
+        if nxt is None or nxt >= end - min_seconds:
+            break
+        cuts.append(nxt)
+    cuts.append(end)
+    return list(zip(cuts[:-1], cuts[1:]))
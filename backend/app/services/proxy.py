@@ -0,0 +1,95 @@
+"""
+Analysis proxy: rendition kecil dari source khusus untuk di-upload ke Gemini.
+
+Gemini cuma sampling video ~1 fps, jadi upload 1080p/30fps itu buang-buang
+bandwidth dan waktu processing di sisi Google. Proxy disimpan di folder source
+(ikut di-share lewat source store) bersama proxy.json berisi statistik hemat byte.
+"""
+import os
+import json
+import time
+import subprocess
+
+from app.core import config
+from app.services import source_store
+
+PROXY_FILENAME = "analysis_proxy.mp4"
+PROXY_STATS_FILENAME = "proxy.json"
+
+
+def _proxy_params(mode):
+    """Parameter yang menentukan isi proxy; proxy lama dibuat ulang kalau ada yang berubah."""
+    return {
+        'mode': mode,
+        'height': config.ANALYSIS_PROXY_HEIGHT,
+        'fps': config.ANALYSIS_PROXY_SPARSE_FPS if mode == "sparse" else config.ANALYSIS_PROXY_FPS,
+        'video_bitrate': config.ANALYSIS_PROXY_VIDEO_BITRATE,
+        'audio_bitrate': config.ANALYSIS_PROXY_AUDIO_BITRATE,
+    }
+
+
+def _proxy_command(video_path, output_path, params):
+    return [
+        'ffmpeg', '-y', '-i', video_path,
+        '-vf', f"fps={params['fps']},scale=-2:{params['height']}",
+        '-c:v', 'libx264', '-preset', 'veryfast', '-b:v', params['video_bitrate'],
+        '-c:a', 'aac', '-ac', '1', '-ar', '16000', '-b:a', params['audio_bitrate'],
+        '-movflags', '+faststart', '-f', 'mp4',
+        output_path
+    ]
+
+
+def ensure_proxy(source_dir, video_path, mode=None):
+    """
+    Buat (atau reuse) proxy untuk analisa. Return path file yang harus di-upload.
+    Kalau mode 'off' atau ffmpeg gagal, return video_path asli.
+    """
+    mode = mode or config.ANALYSIS_PROXY_MODE
+    if mode == "off":
+        return video_path
+
+    proxy_path = f"{source_dir}/{PROXY_FILENAME}"
+    stats_path = f"{source_dir}/{PROXY_STATS_FILENAME}"
+    params = _proxy_params(mode)
+
+    # Lock per source: project lain di source yang sama menunggu lalu reuse proxy-nya
+    with source_store.source_lock(source_dir, "proxy.lock"):
+        stats = load_stats(source_dir)
+        if os.path.exists(proxy_path) and stats and stats.get('params') == params:
+            return proxy_path
+
+        print(f"   🗜️ Membuat analysis proxy (mode: {mode})...")
+        started = time.time()
+        # Tulis ke file sementara lalu rename, supaya upload yang sedang membaca proxy lama tidak rusak
+        temp_path = f"{proxy_path}.tmp"
+        try:
+            subprocess.run(_proxy_command(video_path, temp_path, params), check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        except subprocess.CalledProcessError as e:
+            print(f"   ⚠️ Proxy gagal, upload source asli: {e.stderr.decode('utf8')[-300:]}")
+            return video_path
+        os.replace(temp_path, proxy_path)
+
+        source_bytes = os.path.getsize(video_path)
+        proxy_bytes = os.path.getsize(proxy_path)
+        stats = {
+            'mode': mode,
+            'params': params,
+            'source_bytes': source_bytes,
+            'proxy_bytes': proxy_bytes,
+            'saved_bytes': source_bytes - proxy_bytes,
+            'ratio': round(proxy_bytes / source_bytes, 4) if source_bytes else None,
+            'seconds': round(time.time() - started, 2),
+        }
+        with open(stats_path, "w") as f:
+            json.dump(stats, f)
+
+    print(f"   ✅ Proxy siap: {source_bytes / 1e6:.1f}MB -> {proxy_bytes / 1e6:.1f}MB (hemat {stats['saved_bytes'] / 1e6:.1f}MB, {stats['seconds']}s)")
+    return proxy_path
+
+
+def load_stats(source_dir):
+    stats_path = f"{source_dir}/{PROXY_STATS_FILENAME}"
+    if not os.path.exists(stats_path):
+        return None
+    with open(stats_path) as f:
+        return json.load(f)
@@ -0,0 +1,125 @@
+"""
+Reframing dinamis: crop 9:16 yang mengikuti pembicara per shot.
+
+1. Pergantian shot dideteksi dengan filter `scene` ffmpeg, sekali per source di
+   decode yang sama dengan face track (app/services/faces.py, shots.npy).
+2. Posisi wajah per shot diambil dari face track source.
+3. Lintasan crop dihitung di NumPy: interpolasi di dalam shot, smoothing
+   moving-average yang TIDAK melewati batas shot (cut tetap cut, bukan pan).
+4. Lintasan dipakai ffmpeg lewat `sendcmd` ke filter crop, jadi tetap satu
+   kali encode tanpa re-encode per frame di Python.
+"""
+import re
+import subprocess
+import numpy as np
+
+from app.core import config
+
+_PTS_RE = re.compile(r"pts_time:([0-9.]+)")
+
+
+def parse_scene_times(text):
+    """Waktu cut (detik, urut) dari output filter metadata=print."""
+    return sorted({float(t) for t in _PTS_RE.findall(text)})
+
+
+def window_cuts(shots, start, end):
+    """Cut shot source (array urut) di dalam (start, end), relatif ke start."""
+    lo = np.searchsorted(shots, start, side='right')
+    hi = np.searchsorted(shots, end, side='left')
+    return (np.asarray(shots[lo:hi]) - start).tolist()
+
+
+def detect_shots(video_path, start, duration, threshold=None):
+    """
+    Return list waktu cut (detik, relatif ke `start`). Decode khusus window;
+    hanya untuk source lama yang belum punya shots.npy.
+    """
+    threshold = threshold or config.REFRAME_SCENE_THRESHOLD
+    command = [
+        'ffmpeg', '-nostdin', '-v', 'error', '-ss', str(start), '-t', str(duration), '-i', video_path,
+        '-an', '-vf', f"scale=160:-2,select='gt(scene,{threshold})',metadata=print:file=-",
+        '-f', 'null', '-'
+    ]
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    return parse_scene_times(result.stdout.decode('utf8', 'ignore'))
+
+
+def _moving_average(values, width):
+    if width <= 1 or len(values) <= 2:
+        return values
+    width = min(width, len(values))
+    padded = np.pad(values, (width // 2, width - 1 - width // 2), mode='edge')
+    return np.convolve(padded, np.ones(width) / width, mode='valid')
+
+
+def _next_face_center(track, t, lookahead=3):
+    """Center_x sampel wajah pertama di/sesudah t (maks `lookahead` sampel), else tengah frame."""
+    k = np.searchsorted(track[:, 0], t)
+    ahead = np.asarray(track[k:k + lookahead])
+    hits = ahead[ahead[:, 2] > 0]
+    return float(hits[0, 1]) if len(hits) else 0.5
+
+
+def plan_crop_path(track, start, end, cuts, step=None, smooth_seconds=None):
+    """
+    Lintasan center_x relatif (0..1) untuk window [start, end] di timeline source.
+    `track` = face track (N, 3), `cuts` = waktu cut relatif ke start.
+    Return (times_relatif, centers) array, atau None kalau tidak ada wajah sama sekali.
+    """
+    step = step or config.REFRAME_STEP_SECONDS
+    smooth = max(1, int(round((smooth_seconds or config.REFRAME_SMOOTH_SECONDS) / step)))
+
+    lo, hi = np.searchsorted(track[:, 0], [start, end])
+    window = np.asarray(track[lo:hi])
+    samples = window[window[:, 2] > 0]
+    if len(samples) == 0:
+        return None
+
+    times = np.arange(0.0, end - start, step)
+    sample_t = samples[:, 0] - start
+    bounds = np.concatenate([[0.0], np.asarray(cuts, dtype=float), [end - start]])
+    shot_of_time = np.searchsorted(bounds, times, side='right') - 1
+    shot_of_sample = np.searchsorted(bounds, sample_t, side='right') - 1
+    # Shot yang kena sampel face track sama sekali (dengan atau tanpa wajah)
+    sampled = np.zeros(len(bounds) - 1, dtype=bool)
+    sampled[np.clip(np.searchsorted(bounds, window[:, 0] - start, side='right') - 1, 0, len(sampled) - 1)] = True
+
+    centers = np.full(len(times), np.nan)
+    for shot in np.unique(shot_of_time):
+        in_shot = shot_of_time == shot
+        shot_samples = shot_of_sample == shot
+        if not shot_samples.any():
+            if not sampled[shot]:
+                # Shot lebih pendek dari interval face track: tidak ada sampel, jadi jangan
+                # warisi posisi shot sebelumnya (beda shot); pakai sampel wajah berikutnya
+                centers[in_shot] = _next_face_center(track, start + bounds[shot])
+            continue
+        # Interpolasi posisi wajah di dalam shot, lalu haluskan (tidak nyebrang cut)
+        raw = np.interp(times[in_shot], sample_t[shot_samples], samples[shot_samples, 1])
+        centers[in_shot] = _moving_average(raw, smooth)
+
+    # Shot tanpa wajah (ada sampel, tidak ada wajah): pakai posisi shot terdekat sebelumnya
+    # (atau sesudahnya di awal klip)
+    valid = ~np.isnan(centers)
+    if not valid.any():
+        return None
+    idx = np.where(valid, np.arange(len(centers)), 0)
+    np.maximum.accumulate(idx, out=idx)
+    centers = centers[idx]
+    first = np.argmax(valid)
+    centers[:first] = centers[first]
+    return times, centers
+
+
+def write_sendcmd(times, xs, cmd_path, target="crop@reframe", min_delta=2):
+    """Tulis file sendcmd; perintah hanya dikirim kalau posisi bergeser >= min_delta pixel."""
+    lines, last = [], None
+    for t, x in zip(times, xs):
+        x = int(x)
+        if last is None or abs(x - last) >= min_delta:
+            lines.append(f"{t:.3f} {target} x {x};")
+            last = x
+    with open(cmd_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return len(lines)
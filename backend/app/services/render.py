@@ -0,0 +1,353 @@
+"""
+Render engine klip 9:16.
+
+Satu invocation ffmpeg per klip: seek akurat ke window di file source
+(`-ss` sebelum `-i` + re-encode = decode mulai keyframe terdekat lalu buang
+frame sampai titik start, tanpa file temp), lalu crop + subtitle + encode.
+Dimensi diambil dari probe yang di-cache (sources.cached_probe), bukan
+membuka container lagi.
+"""
+import os
+import shutil
+import subprocess
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core import config
+from app.services import reframe, sources, keyframes
+
+# Style Baru: Font Lebih Besar & Kuning Terang (Supaya 1 kata kelihatan jelas)
+# Alignment 10 (Middle Center) atau 2 (Bottom Center). Kita pakai 2 (Bottom).
+SUBTITLE_STYLE = "Fontname=Liberation Sans,Fontsize=20,PrimaryColour=&H00FFFF,BorderStyle=3,BackColour=&H80000000,Outline=0,Shadow=0,Alignment=2,MarginV=60,Bold=1"
+
+
+def crop_filter(width, height, center_x, crop_path=None, cmd_path=None, target="crop@reframe"):
+    """
+    Filter crop 9:16. Dengan crop_path, posisi X berubah sepanjang klip lewat
+    sendcmd (masih satu kali encode); tanpa itu satu posisi statis dari center_x.
+    `target` = nama instance crop; harus unik per klip kalau beberapa klip
+    berbagi satu filtergraph (render_batch).
+    """
+    target_width = int(height * 9 / 16)
+    if crop_path is not None and cmd_path:
+        times, centers = crop_path
+        xs = np.clip((centers * width).astype(int) - target_width // 2, 0, width - target_width)
+        commands = reframe.write_sendcmd(times, xs, cmd_path, target=target)
+        print(f"   🎯 Reframe dinamis: {commands} titik crop")
+        return f"sendcmd=f='{os.path.abspath(cmd_path)}',{target}={target_width}:{height}:{xs[0]}:0"
+
+    x_start = int(center_x - (target_width // 2))
+    x_start = max(0, min(x_start, width - target_width))
+    return f"crop={target_width}:{height}:{x_start}:0"
+
+
+def subtitle_filter(sub_path, style=SUBTITLE_STYLE):
+    """Script ASS membawa style sendiri di header; force_style hanya untuk SRT."""
+    if sub_path.endswith(".ass"):
+        return f"subtitles='{os.path.abspath(sub_path)}'"
+    return f"subtitles='{os.path.abspath(sub_path)}':force_style='{style}'"
+
+
+# Profil encode per platform distribusi (app/api/v1/distribution.py).
+# width x height = frame output tetap (scale + pad, 9:16 1080x1920), bitrate = batas
+# per platform, max_duration = batas durasi platform (klip lebih panjang dipotong).
+PROFILES = {
+    'tiktok': {'width': 1080, 'height': 1920, 'video_bitrate': '4M', 'maxrate': '6M', 'audio_bitrate': '128k', 'max_duration': 600},
+    'instagram': {'width': 1080, 'height': 1920, 'video_bitrate': '3500k', 'maxrate': '5M', 'audio_bitrate': '128k', 'max_duration': 90},
+    'youtube_shorts': {'width': 1080, 'height': 1920, 'video_bitrate': '6M', 'maxrate': '8M', 'audio_bitrate': '192k', 'max_duration': 180},
+}
+# Klip utama (preview/download): perilaku lama
+MASTER_PROFILE = {'preset': 'ultrafast', 'audio_bitrate': '128k'}
+# Preview editor tier 1: kecil & cepat dibuka (faststart ada di semua output)
+PREVIEW_PROFILE = {
+    'preset': 'ultrafast', 'height': config.DRAFT_PREVIEW_HEIGHT,
+    'video_bitrate': config.DRAFT_PREVIEW_VIDEO_BITRATE, 'maxrate': config.DRAFT_PREVIEW_VIDEO_BITRATE,
+    'audio_bitrate': '64k',
+}
+
+
+def profiles_for(duration, platforms):
+    """Platform yang dikenal dari `platforms`; klip lebih panjang dari batas platform di-log (dipotong saat encode)."""
+    selected = []
+    for platform in platforms:
+        profile = PROFILES.get(platform)
+        if not profile:
+            print(f"   ⚠️ Profil render tidak dikenal: {platform}")
+            continue
+        if duration > profile['max_duration']:
+            print(f"   ✂️ Varian {platform}: klip {duration:.0f}s dipotong ke batas {profile['max_duration']}s")
+        selected.append(platform)
+    return selected
+
+
+def variant_profile(platform, duration):
+    """Profil encode varian untuk klip berdurasi `duration` ('trim' = durasi output kalau melebihi batas)."""
+    profile = PROFILES[platform]
+    if duration > profile['max_duration']:
+        return {**profile, 'trim': profile['max_duration']}
+    return profile
+
+
+def _profile_filter(profile):
+    """Filter ukuran frame output profil: frame tetap (scale + pad) atau batas tinggi saja."""
+    if 'width' in profile:
+        w, h = profile['width'], profile['height']
+        return f"scale={w}:{h}:force_original_aspect_ratio=decrease,pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,setsar=1"
+    if 'height' in profile:
+        return f"scale=-2:'min({profile['height']},ih)'"
+    return None
+
+
+def _encode_args(profile, has_audio, copy_audio=False):
+    args = ['-c:v', 'libx264', '-preset', profile.get('preset', 'veryfast')]
+    if 'video_bitrate' in profile:
+        args += ['-b:v', profile['video_bitrate'], '-maxrate', profile['maxrate'], '-bufsize', profile['maxrate']]
+    if 'threads' in profile:
+        args += ['-threads', str(profile['threads'])]
+    if 'trim' in profile:
+        args += ['-t', f"{profile['trim']:.3f}"]
+    if not has_audio:
+        args += ['-an']
+    elif copy_audio:
+        args += ['-c:a', 'copy']
+    else:
+        args += ['-c:a', 'aac', '-b:a', profile['audio_bitrate']]
+    return args + ['-movflags', '+faststart']
+
+
+def _output_args(chain, targets, has_audio, copy_audio=False):
+    """
+    Argumen filter + output ffmpeg untuk `targets` = list (profile, path).
+    Target pertama = klip utama; target lain dapat cabang split (+ filter ukuran frame profil).
+    """
+    if len(targets) == 1:
+        profile, path = targets[0]
+        if _profile_filter(profile):
+            chain = f"{chain},{_profile_filter(profile)}"
+        return ['-vf', chain] + _encode_args(profile, has_audio, copy_audio) + [path]
+
+    labels = "".join(f"[v{i}]" for i in range(len(targets)))
+    graph = [f"[0:v]{chain},split={len(targets)}{labels}"]
+    args = []
+    for i, (profile, path) in enumerate(targets):
+        label = f"[v{i}]"
+        if _profile_filter(profile):
+            graph.append(f"[v{i}]{_profile_filter(profile)}[out{i}]")
+            label = f"[out{i}]"
+        args += ['-map', label, '-map', '0:a?'] + _encode_args(profile, has_audio, copy_audio) + [path]
+    return ['-filter_complex', ";".join(graph)] + args
+
+
+def render_window(video_path, start, end, output_path, filters, probe, variants=None, copy_audio=False, profile=None):
+    """
+    Cut + filter + encode window [start, end] (detik, relatif ke video_path) dalam satu pass.
+    `filters` = list filter video (crop, subtitles, ...). Timestamp output mulai dari 0,
+    jadi subtitle & sendcmd cukup memakai waktu relatif klip.
+
+    `variants` = {platform: path}: hasil crop+subtitle yang sama di-split ke encoder
+    tambahan per profil platform, jadi window hanya di-decode & di-crop sekali.
+    `copy_audio` = stream-copy audio (input sudah AAC siap pakai, mis. draft editor).
+    `profile` = profil output utama (default MASTER_PROFILE; 'height' = scale turun).
+
+    Klip panjang di host dengan core menganggur di-encode per segmen secara paralel
+    (lihat parallel_workers / _render_segments).
+    """
+    variants = variants or {}
+    has_audio = probe.get('has_audio', True)
+    profile = profile or MASTER_PROFILE
+    chain = ",".join(filters + ["format=yuv420p"])
+    targets = [(profile, output_path)] + [(variant_profile(p, end - start), path) for p, path in variants.items()]
+
+    workers = parallel_workers(end - start)
+    if workers > 1:
+        keyframes.build_index(video_path)
+        target_seconds = max(config.RENDER_SEGMENT_SECONDS, (end - start) / workers)
+        segments = keyframes.segment_boundaries(keyframes.load_index(video_path), start, end, target_seconds)
+        if len(segments) > 1:
+            return _render_segments(video_path, start, end, segments, chain, targets, has_audio, copy_audio, workers)
+
+    command = ['ffmpeg', '-y', '-nostdin', '-ss', f"{start:.3f}", '-t', f"{end - start:.3f}", '-i', video_path]
+    command += _output_args(chain, targets, has_audio, copy_audio)
+    subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return output_path
+
+
+def parallel_workers(duration):
+    """
+    Jumlah proses encode paralel untuk klip berdurasi `duration`:
+    1 (single-pass) kalau mode off, klip pendek, atau core sedang sibuk (load average).
+    """
+    if config.RENDER_PARALLEL_MODE == "off" or duration < config.RENDER_PARALLEL_MIN_SECONDS:
+        return 1
+    cores = os.cpu_count() or 1
+    free_cores = cores - os.getloadavg()[0]
+    workers = int(free_cores // config.RENDER_THREADS_PER_SEGMENT)
+    if config.RENDER_PARALLEL_MAX_WORKERS:
+        workers = min(workers, config.RENDER_PARALLEL_MAX_WORKERS)
+    return max(1, workers)
+
+
+def _render_segments(video_path, start, end, segments, chain, targets, has_audio, copy_audio, workers):
+    """
+    Encode paralel per segmen GOP-aligned lalu concat stream-copy (lossless).
+    - Tiap segmen: timestamp digeser ke waktu klip (setpts +offset) SEBELUM filter,
+      jadi subtitle & sendcmd crop melihat waktu yang sama seperti single-pass
+      (posisi crop di awal segmen = posisi terakhir dari sendcmd), lalu di-reset ke 0.
+    - Audio di-encode sekali untuk seluruh window, di-mux saat concat.
+    """
+    output_path = targets[0][1]
+    parts_dir = f"{output_path}.parts"
+    os.makedirs(parts_dir, exist_ok=True)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"   ⚡ Encode paralel: {len(segments)} segmen x {workers} proses ({threads} thread/proses)")
+
+    def encode_segment(k):
+        seg_start, seg_end = segments[k]
+        segment_chain = f"setpts=PTS+{seg_start - start:.3f}/TB,{chain},setpts=PTS-STARTPTS"
+        # Potong durasi varian ('trim') baru saat concat, bukan per segmen
+        part_targets = [({**{key: v for key, v in profile.items() if key != 'trim'}, 'threads': threads}, f"{parts_dir}/v{j}_{k:03}.mp4")
+                        for j, (profile, _) in enumerate(targets)]
+        command = ['ffmpeg', '-y', '-nostdin', '-ss', f"{seg_start:.3f}", '-t', f"{seg_end - seg_start:.3f}", '-i', video_path]
+        command += _output_args(segment_chain, part_targets, has_audio=False)
+        subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    # Satu file audio per setelan audio yang berbeda (copy / bitrate), bukan per target
+    audio_args = {}
+    for j, (profile, _) in enumerate(targets):
+        key = 'copy' if copy_audio else profile['audio_bitrate']
+        audio_args.setdefault(key, f"{parts_dir}/audio_{len(audio_args)}.m4a")
+
+    def encode_audio(key):
+        codec = ['-c:a', 'copy'] if key == 'copy' else ['-c:a', 'aac', '-b:a', key]
+        command = ['ffmpeg', '-y', '-nostdin', '-ss', f"{start:.3f}", '-t', f"{end - start:.3f}", '-i', video_path,
+                   '-vn'] + codec + [audio_args[key]]
+        subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers + 1) as pool:
+            futures = [pool.submit(encode_segment, k) for k in range(len(segments))]
+            if has_audio:
+                futures += [pool.submit(encode_audio, key) for key in audio_args]
+            for future in futures:
+                future.result()
+
+        for j, (profile, path) in enumerate(targets):
+            list_path = f"{parts_dir}/v{j}.txt"
+            parts = [os.path.abspath(f"{parts_dir}/v{j}_{k:03}.mp4") for k in range(len(segments))]
+            with open(list_path, "w") as f:
+                f.writelines(f"file '{part}'\n" for part in parts)
+            command = ['ffmpeg', '-y', '-nostdin', '-f', 'concat', '-safe', '0', '-i', list_path]
+            if has_audio:
+                command += ['-i', audio_args['copy' if copy_audio else profile['audio_bitrate']], '-map', '0:v', '-map', '1:a']
+            if 'trim' in profile:
+                command += ['-t', f"{profile['trim']:.3f}"]
+            command += ['-c', 'copy', '-movflags', '+faststart', path]
+            subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+    return output_path
+
+
+def render_overlay(draft_path, output_path, filters, variants=None):
+    """
+    Render final dari draft editor (crop 9:16 polos): hanya overlay `filters`
+    (subtitle) yang di-encode ulang, audio draft di-stream-copy.
+    """
+    probe = sources.cached_probe(draft_path)
+    return render_window(draft_path, 0.0, probe['duration'], output_path, filters, probe, variants, copy_audio=True)
+
+
+def encode_variant(clip_path, output_path, platform):
+    """Varian platform dari klip yang sudah dirender (subtitle sudah ter-burn): satu encode."""
+    probe = sources.cached_probe(clip_path)
+    return render_window(clip_path, 0.0, probe['duration'], output_path, [], probe,
+                         profile=variant_profile(platform, probe['duration']))
+
+
+def plan_batches(jobs, max_gap=None, max_clips=None):
+    """
+    Kelompokkan job render {'path', 'start', 'end'} (waktu relatif ke path) jadi batch:
+    job di file yang sama, urut timeline, dan jaraknya berdekatan masuk satu batch
+    (satu decode). Return list batch, tiap batch = list index job.
+    """
+    max_gap = config.RENDER_BATCH_GAP_SECONDS if max_gap is None else max_gap
+    max_clips = max_clips or config.RENDER_BATCH_MAX_CLIPS
+
+    batches, current, current_end = [], [], None
+    for i in sorted(range(len(jobs)), key=lambda i: (jobs[i]['path'], jobs[i]['start'])):
+        job = jobs[i]
+        if current and (
+            job['path'] != jobs[current[0]]['path']
+            or job['start'] - current_end > max_gap
+            or len(current) >= max_clips
+        ):
+            batches.append(current)
+            current = []
+        if not current:
+            current_end = job['end']
+        current.append(i)
+        current_end = max(current_end, job['end'])
+    if current:
+        batches.append(current)
+    return batches
+
+
+def render_batch(video_path, clips, probe):
+    """
+    Render beberapa klip dari SATU decode window gabungan mereka.
+    `clips` = list {'start', 'end', 'filters', 'output', 'variants'} (waktu relatif ke video_path).
+    Tiap klip dapat cabang split -> trim -> setpts (timestamp mulai 0 lagi) -> filter
+    masing-masing, lalu encoder sendiri (plus varian platform-nya).
+    """
+    has_audio = probe.get('has_audio', True)
+    span_start = min(c['start'] for c in clips)
+    span_end = max(c['end'] for c in clips)
+    n = len(clips)
+
+    graph = ["[0:v]split=%d%s" % (n, "".join(f"[v{i}]" for i in range(n)))]
+    if has_audio:
+        graph.append("[0:a]asplit=%d%s" % (n, "".join(f"[a{i}]" for i in range(n))))
+
+    outputs = []
+    for i, clip in enumerate(clips):
+        start, end = clip['start'] - span_start, clip['end'] - span_start
+        variants = clip.get('variants') or {}
+        branches = len(variants) + 1
+        chain = ",".join([f"trim=start={start:.3f}:end={end:.3f}", "setpts=PTS-STARTPTS"] + clip['filters'] + ["format=yuv420p"])
+        graph.append(f"[v{i}]{chain},split={branches}" + "".join(f"[v{i}_{j}]" for j in range(branches)))
+        if has_audio:
+            graph.append(f"[a{i}]atrim=start={start:.3f}:end={end:.3f},asetpts=PTS-STARTPTS,asplit={branches}"
+                         + "".join(f"[a{i}_{j}]" for j in range(branches)))
+
+        targets = [(MASTER_PROFILE, clip['output'], f"[v{i}_0]")]
+        for j, (platform, path) in enumerate(variants.items(), 1):
+            profile = variant_profile(platform, end - start)
+            graph.append(f"[v{i}_{j}]{_profile_filter(profile)}[s{i}_{j}]")
+            targets.append((profile, path, f"[s{i}_{j}]"))
+
+        for j, (profile, path, video_label) in enumerate(targets):
+            outputs += ['-map', video_label]
+            if has_audio:
+                outputs += ['-map', f"[a{i}_{j}]"]
+            outputs += _encode_args(profile, has_audio) + [path]
+
+    command = ['ffmpeg', '-y', '-nostdin', '-ss', f"{span_start:.3f}", '-t', f"{span_end - span_start:.3f}",
+               '-i', video_path, '-filter_complex', ";".join(graph)] + outputs
+
+    subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return [c['output'] for c in clips]
+
+
+def copy_window(video_path, start, end, output_path):
+    """
+    Fast path export horizontal tanpa crop: stream-copy (tanpa encode) mulai dari
+    keyframe <= start (dari keyframe index), jadi frame pertama selalu decodable.
+    Return dict {'path', 'start', 'end'}: `start` = titik mulai sebenarnya di file.
+    """
+    keyframes.build_index(video_path)
+    index = keyframes.load_index(video_path)
+    seek = keyframes.keyframe_at_or_before(index, start)
+    command = ['ffmpeg', '-y', '-nostdin', '-ss', f"{seek:.3f}", '-i', video_path, '-t', f"{end - seek:.3f}",
+               '-map', '0', '-c', 'copy', '-avoid_negative_ts', 'make_zero', '-movflags', '+faststart', output_path]
+    subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return {'path': output_path, 'start': seek, 'end': end}
@@ -0,0 +1,141 @@
+"""
+Source store content-addressed: satu folder per (YouTube video id, format).
+
+Layout:
+    downloads/sources/{video_id}-{format_tag}/
+        source.mp4 / analysis.mp4   <- hasil download (lihat app/services/sources.py)
+        probe.json                  <- metadata ffprobe + durasi yt-dlp
+        sections/                   <- section hi-res (mode sections)
+        ...                         <- artefak turunan lain (transcript, faces, dst)
+
+Project menunjuk ke folder ini lewat Project.source_key. Jumlah Project yang
+memakai key yang sama = reference count; folder tanpa referensi dibersihkan
+oleh cleanup_unreferenced().
+"""
+import os
+import re
+import json
+import time
+import fcntl
+import shutil
+import hashlib
+import yt_dlp
+from contextlib import contextmanager
+
+from app.core import config
+from app.services import sources
+
+STORE_ROOT = "downloads/sources"
+PROBE_FILENAME = "probe.json"
+# Jangan hapus source yang baru disentuh: Project.source_key di-commit setelah acquire()
+CLEANUP_GRACE_SECONDS = 3600
+
+_VIDEO_ID_PATTERNS = [
+    r"(?:v=|/v/)([A-Za-z0-9_-]{11})",
+    r"youtu\.be/([A-Za-z0-9_-]{11})",
+    r"/(?:shorts|embed|live)/([A-Za-z0-9_-]{11})",
+]
+
+
+def extract_video_id(url):
+    """Ambil YouTube video id dari URL, fallback ke yt-dlp kalau format URL aneh."""
+    for pattern in _VIDEO_ID_PATTERNS:
+        match = re.search(pattern, url)
+        if match:
+            return match.group(1)
+    with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
+        return ydl.extract_info(url, download=False)['id']
+
+
+def source_key_for(url, mode=None):
+    """Key = video id + tag pendek dari mode & format yt-dlp yang dipakai."""
+    mode = mode or config.SOURCE_FETCH_MODE
+    fmt = config.ANALYSIS_FORMAT if mode == "sections" else config.SOURCE_FORMAT
+    format_tag = hashlib.sha1(f"{mode}|{fmt}".encode()).hexdigest()[:8]
+    return f"{extract_video_id(url)}-{format_tag}"
+
+
+def source_dir(key):
+    return f"{STORE_ROOT}/{key}"
+
+
+def source_dir_for(project):
+    """Folder source untuk sebuah Project (project lama tanpa source_key pakai folder project)."""
+    if project.source_key:
+        return source_dir(project.source_key)
+    return f"downloads/{project.id}"
+
+
+@contextmanager
+def source_lock(folder, name="lock"):
+    """Lock fcntl eksklusif per folder source (antar worker/proses)."""
+    with open(f"{folder}/.{name}", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_probe(key):
+    path = f"{source_dir(key)}/{PROBE_FILENAME}"
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def acquire(url):
+    """
+    Pastikan source untuk URL ini ada di store.
+    Return dict {'key', 'dir', 'path', 'duration', 'probe', 'cached'}.
+    Download hanya terjadi sekali per key; worker lain menunggu lock lalu reuse.
+    """
+    key = source_key_for(url)
+    folder = source_dir(key)
+    os.makedirs(folder, exist_ok=True)
+
+    with source_lock(folder):
+        probe = load_probe(key)
+        if probe and os.path.exists(probe['path']):
+            print(f"   ♻️ Source cache HIT: {key}")
+            os.utime(f"{folder}/{PROBE_FILENAME}")
+            return {'key': key, 'dir': folder, 'path': probe['path'],
+                    'duration': probe['duration'], 'probe': probe, 'cached': True}
+
+        print(f"   📥 Source cache MISS: {key}, downloading...")
+        video_path, duration = sources.download_source(url, folder)
+        if not video_path or not os.path.exists(video_path):
+            return None
+
+        probe = sources.cached_probe(video_path)
+        probe['path'] = video_path
+        probe['duration'] = duration or probe['duration']
+        with open(f"{folder}/{PROBE_FILENAME}", "w") as f:
+            json.dump(probe, f)
+
+        return {'key': key, 'dir': folder, 'path': video_path,
+                'duration': probe['duration'], 'probe': probe, 'cached': False}
+
+
+def reference_count(db, key):
+    from app.db.models import Project
+    return db.query(Project).filter(Project.source_key == key).count()
+
+
+def cleanup_unreferenced(db):
+    """Hapus folder source yang sudah tidak dipakai Project mana pun. Return list key yang dihapus."""
+    if not os.path.isdir(STORE_ROOT):
+        return []
+
+    removed = []
+    now = time.time()
+    for key in os.listdir(STORE_ROOT):
+        probe_path = f"{source_dir(key)}/{PROBE_FILENAME}"
+        last_used = os.path.getmtime(probe_path) if os.path.exists(probe_path) else os.path.getmtime(source_dir(key))
+        if now - last_used < CLEANUP_GRACE_SECONDS:
+            continue
+        if reference_count(db, key) == 0:
+            shutil.rmtree(source_dir(key), ignore_errors=True)
+            removed.append(key)
+    return removed
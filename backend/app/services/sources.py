@@ -0,0 +1,174 @@
+"""
+Pengambilan video source dari YouTube.
+
+Dua mode (lihat SOURCE_FETCH_MODE di app/core/config.py):
+- full     : download utuh ke source.mp4, semua tahap membaca file itu.
+- sections : analisa jalan di analysis.mp4 (low-res), lalu byte hi-res
+             diambil belakangan hanya untuk window kandidat (range download yt-dlp).
+"""
+import os
+import json
+import glob
+import subprocess
+import yt_dlp
+from yt_dlp.utils import download_range_func
+
+from app.core import config
+
+SOURCE_FILENAME = "source.mp4"
+ANALYSIS_FILENAME = "analysis.mp4"
+SECTIONS_DIR = "sections"
+
+
+def probe_video(path):
+    """Ambil metadata dasar (width, height, duration, fps) lewat ffprobe."""
+    result = subprocess.run(
+        ['ffprobe', '-v', 'error', '-print_format', 'json', '-show_format', '-show_streams', path],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    data = json.loads(result.stdout or b"{}")
+    video = next((s for s in data.get('streams', []) if s.get('codec_type') == 'video'), {})
+
+    fps = 0.0
+    if video.get('avg_frame_rate', '0/0') != '0/0':
+        num, den = video['avg_frame_rate'].split('/')
+        fps = float(num) / float(den) if float(den) else 0.0
+
+    return {
+        'width': int(video.get('width', 0)),
+        'height': int(video.get('height', 0)),
+        'duration': float(data.get('format', {}).get('duration', 0) or 0),
+        'fps': fps,
+        'has_audio': any(s.get('codec_type') == 'audio' for s in data.get('streams', [])),
+    }
+
+
+def cached_probe(path):
+    """
+    probe_video dengan cache sidecar `{path}.probe.json`, jadi tiap render tidak
+    perlu ffprobe / membuka container lagi untuk tahu dimensi.
+    """
+    sidecar = f"{path}.probe.json"
+    if os.path.exists(sidecar) and os.path.getmtime(sidecar) >= os.path.getmtime(path):
+        with open(sidecar) as f:
+            return json.load(f)
+    probe = probe_video(path)
+    with open(sidecar, "w") as f:
+        json.dump(probe, f)
+    return probe
+
+
+def download_source(url, output_folder, mode=None):
+    """
+    Download untuk tahap analisa.
+    Return (path, duration). Di mode 'sections' path-nya adalah analysis.mp4 (low-res).
+    """
+    mode = mode or config.SOURCE_FETCH_MODE
+    if mode == "sections":
+        filename, fmt = ANALYSIS_FILENAME, config.ANALYSIS_FORMAT
+    else:
+        filename, fmt = SOURCE_FILENAME, config.SOURCE_FORMAT
+
+    ydl_opts = {
+        'format': fmt,
+        'outtmpl': f'{output_folder}/{os.path.splitext(filename)[0]}.%(ext)s',
+        'merge_output_format': 'mp4',
+        'quiet': True, 'no_warnings': True, 'nocheckcertificate': True, 'socket_timeout': 30,
+    }
+    try:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=True)
+            return f"{output_folder}/{filename}", info.get('duration', 0)
+    except Exception as e:
+        print(f"❌ Download Error: {e}")
+        return None, 0
+
+
+def fetch_section(url, output_folder, start, end, source_duration=None):
+    """
+    Download range [start, end] (plus padding) dalam kualitas hi-res.
+    Return dict {'path', 'start', 'end'} dengan waktu absolut section di timeline source.
+    """
+    pad = config.SECTION_PADDING_SECONDS
+    sec_start = max(0.0, start - pad)
+    sec_end = end + pad
+    if source_duration:
+        sec_end = min(sec_end, float(source_duration))
+
+    sections_dir = f"{output_folder}/{SECTIONS_DIR}"
+    os.makedirs(sections_dir, exist_ok=True)
+    name = f"{int(sec_start * 1000)}_{int(sec_end * 1000)}"
+    section_path = f"{sections_dir}/{name}.mp4"
+
+    print(f"   📥 Download section hi-res ({sec_start:.1f}s - {sec_end:.1f}s)...")
+    ydl_opts = {
+        'format': config.SOURCE_FORMAT,
+        'outtmpl': f'{sections_dir}/{name}.%(ext)s',
+        'merge_output_format': 'mp4',
+        'download_ranges': download_range_func(None, [(sec_start, sec_end)]),
+        'quiet': True, 'no_warnings': True, 'nocheckcertificate': True, 'socket_timeout': 30,
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        ydl.download([url])
+
+    if not os.path.exists(section_path):
+        raise Exception("Section download failed")
+
+    # Cut stream-copy mulai dari keyframe SEBELUM sec_start, jadi titik 0 file
+    # belum tentu == sec_start. Ujung akhir cut akurat, jadi start asli
+    # dihitung mundur dari durasi file hasil download.
+    actual_duration = cached_probe(section_path)['duration']
+    actual_start = max(0.0, sec_end - actual_duration) if actual_duration else sec_start
+
+    meta = {'path': section_path, 'start': actual_start, 'end': sec_end}
+    with open(f"{sections_dir}/{name}.json", "w") as f:
+        json.dump(meta, f)
+    return meta
+
+
+def _find_covering_section(output_folder, start, end):
+    for meta_path in glob.glob(f"{output_folder}/{SECTIONS_DIR}/*.json"):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta['start'] <= start and meta['end'] >= end and os.path.exists(meta['path']):
+            return meta
+    return None
+
+
+def local_media_path(source_dir):
+    """File lokal yang menutup seluruh timeline (source.mp4, atau analysis.mp4 di mode sections)."""
+    for filename in (SOURCE_FILENAME, ANALYSIS_FILENAME):
+        path = f"{source_dir}/{filename}"
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def resolve_window(work_dir, youtube_url, start, end):
+    """
+    Cari file hi-res yang menutup window [start, end].
+    Return dict {'path', 'start', 'end'} dengan waktu relatif terhadap file tersebut.
+    """
+    source_path = f"{work_dir}/{SOURCE_FILENAME}"
+    if os.path.exists(source_path):
+        return {'path': source_path, 'start': start, 'end': end}
+
+    analysis_path = f"{work_dir}/{ANALYSIS_FILENAME}"
+    if not os.path.exists(analysis_path):
+        raise Exception("Source video missing.")
+
+    section = _find_covering_section(work_dir, start, end)
+    if not section:
+        # Lock per source: task lain untuk window yang sama menunggu lalu reuse section-nya
+        from app.services.source_store import source_lock
+        with source_lock(work_dir, "sections.lock"):
+            section = _find_covering_section(work_dir, start, end)
+            if not section:
+                duration = cached_probe(analysis_path)['duration']
+                section = fetch_section(youtube_url, work_dir, start, end, duration)
+
+    return {
+        'path': section['path'],
+        'start': start - section['start'],
+        'end': end - section['start'],
+    }
@@ -0,0 +1,118 @@
+"""
+Generator subtitle untuk burn-in.
+
+- ASS (default): kata dikelompokkan jadi baris pendek; tiap kata dapat satu
+  event Dialogue berisi seluruh baris dengan HANYA kata itu berwarna highlight
+  (kata yang sudah lewat kembali putih). Style ada di header script, jadi
+  command ffmpeg tidak butuh force_style.
+- SRT satu kata satu cue: format lama, tetap ada untuk SUBTITLE_FORMAT=srt
+  dan sebagai pembanding di bench_subtitles.py.
+"""
+from app.core import config
+
+# Resolusi kanvas script; libass men-scale ke ukuran video (9:16)
+PLAY_RES_X = 1080
+PLAY_RES_Y = 1920
+
+# Teks = PrimaryColour (putih); kata yang sedang diucapkan di-override HIGHLIGHT_COLOUR
+# (kuning) per event. Box semi-transparan seperti style SRT lama (BorderStyle=3).
+ASS_HEADER = f"""[Script Info]
+ScriptType: v4.00+
+PlayResX: {PLAY_RES_X}
+PlayResY: {PLAY_RES_Y}
+WrapStyle: 0
+ScaledBorderAndShadow: yes
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Karaoke,Liberation Sans,84,&H00FFFFFF,&H00FFFFFF,&H00000000,&H80000000,-1,0,0,0,100,100,0,0,3,6,0,2,60,60,380,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+# Override warna inline (&HBBGGRR&): kuning
+HIGHLIGHT_COLOUR = "&H00FFFF&"
+
+_LINE_BREAK_PUNCTUATION = (".", ",", "?", "!", ";", ":")
+
+
+def group_lines(words, max_words=None, max_seconds=None, max_gap=None):
+    """
+    Kelompokkan kata jadi baris: baris baru kalau sudah max_words, terlalu panjang
+    (detik), ada jeda bicara > max_gap, atau kata sebelumnya diakhiri tanda baca.
+    """
+    max_words = max_words or config.SUBTITLE_MAX_WORDS
+    max_seconds = max_seconds or config.SUBTITLE_MAX_LINE_SECONDS
+    max_gap = config.SUBTITLE_MAX_GAP_SECONDS if max_gap is None else max_gap
+
+    lines, current = [], []
+    for w in words:
+        if not w['word'].strip():
+            continue
+        if current and (
+            len(current) >= max_words
+            or w['end'] - current[0]['start'] > max_seconds
+            or w['start'] - current[-1]['end'] > max_gap
+            or current[-1]['word'].rstrip().endswith(_LINE_BREAK_PUNCTUATION)
+        ):
+            lines.append(current)
+            current = []
+        current.append(w)
+    if current:
+        lines.append(current)
+    return lines
+
+
+def _ass_time(seconds):
+    cs = int(round(max(0.0, seconds) * 100))
+    hrs, rem = divmod(cs, 360000)
+    mins, rem = divmod(rem, 6000)
+    secs, cs = divmod(rem, 100)
+    return f"{hrs}:{mins:02}:{secs:02}.{cs:02}"
+
+
+def _ass_escape(text):
+    # ASS tidak punya escape: backslash dibuang (\N, \h dst. akan dibaca libass sebagai tag)
+    return text.strip().replace("\\", "").replace("{", "(").replace("}", ")").replace("\n", " ")
+
+
+def write_ass(words, output_path, **grouping):
+    """
+    Tulis script ASS dengan highlight satu kata: satu event Dialogue per kata,
+    dari kata itu mulai sampai kata berikutnya mulai (jeda ikut kata sebelumnya).
+    Return jumlah event Dialogue.
+    """
+    lines = group_lines(words, **grouping)
+    events = 0
+    with open(output_path, "w", encoding='utf-8') as f:
+        f.write(ASS_HEADER)
+        for line in lines:
+            texts = [_ass_escape(w['word']) for w in line]
+            for i, w in enumerate(line):
+                until = line[i + 1]['start'] if i + 1 < len(line) else w['end']
+                parts = texts[:i] + [f"{{\\1c{HIGHLIGHT_COLOUR}}}{texts[i]}{{\\r}}"] + texts[i + 1:]
+                f.write(f"Dialogue: 0,{_ass_time(w['start'])},{_ass_time(until)},Karaoke,,0,0,0,,{' '.join(parts)}\n")
+                events += 1
+    return events
+
+
+def _srt_time(seconds):
+    ms = int((seconds % 1) * 1000)
+    seconds = int(seconds)
+    mins, secs = divmod(seconds, 60)
+    hrs, mins = divmod(mins, 60)
+    return f"{hrs:02}:{mins:02}:{secs:02},{ms:03}"
+
+
+def write_srt_one_word(words, output_path):
+    """
+    Konversi data Whisper ke SRT format 'Satu Kata Satu Waktu'. Return jumlah cue.
+    """
+    with open(output_path, "w", encoding='utf-8') as f:
+        for counter, w in enumerate(words, 1):
+            # Tulis block SRT untuk 1 kata ini
+            f.write(f"{counter}\n")
+            f.write(f"{_srt_time(w['start'])} --> {_srt_time(w['end'])}\n")
+            f.write(f"{w['word']}\n\n")
+    return len(words)
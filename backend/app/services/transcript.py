@@ -0,0 +1,56 @@
+"""
+Transkrip level project/source: Whisper dijalankan SEKALI untuk seluruh source,
+hasilnya (word-level) disimpan di folder source sebagai transcript.json.
+
+Transkrip per kandidat diambil dengan binary search di array kata lalu
+timestamp-nya di-rebase ke awal klip (0 = start kandidat).
+"""
+import os
+import json
+from bisect import bisect_left
+
+TRANSCRIPT_FILENAME = "transcript.json"
+
+
+def transcript_path(source_dir):
+    return f"{source_dir}/{TRANSCRIPT_FILENAME}"
+
+
+def load(source_dir):
+    path = transcript_path(source_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save(source_dir, words):
+    """Tulis atomik (tmp + rename) supaya pembaca tidak pernah dapat file setengah jadi."""
+    path = transcript_path(source_dir)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding='utf-8') as f:
+        json.dump(words, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def _word_start(w):
+    return w['start']
+
+
+def slice_words(words, start, end):
+    """
+    Ambil kata yang mulai di dalam [start, end) dan rebase timestamp ke start.
+    `words` harus urut berdasarkan 'start' (output Whisper memang urut).
+    """
+    lo = bisect_left(words, start, key=_word_start)
+    hi = bisect_left(words, end, lo, key=_word_start)
+
+    clip_len = end - start
+    return [
+        {
+            'start': round(max(0.0, w['start'] - start), 3),
+            'end': round(min(clip_len, w['end'] - start), 3),
+            'word': w['word'],
+        }
+        for w in words[lo:hi]
+    ]
@@ -0,0 +1,298 @@
+"""
+Engine transkripsi untuk worker transkripsi.
+
+Semua engine mengembalikan format yang sama: list [{start, end, word}].
+- "whisper"        : openai-whisper (PyTorch, fp32 di CPU) - perilaku lama
+- "faster-whisper" : CTranslate2 dengan bobot int8, jauh lebih ringan di host CPU-only
+
+Engine dipilih per deployment lewat TRANSCRIBE_ENGINE. Module ini SENGAJA tidak
+meng-import library model di level module: hanya worker queue transcribe yang
+memanggil load_model() (di worker_process_init), jadi worker render/analisa
+tidak pernah memegang bobot model di memori.
+"""
+import os
+import time
+import resource
+import numpy as np
+from bisect import bisect_right
+
+from app.core import config
+from app.services import audio, vad
+
+SAMPLE_RATE = audio.SAMPLE_RATE
+# Window input model Whisper; clip batched inference tidak boleh lebih panjang
+CLIP_SECONDS = 30
+CLIP_SAMPLES = CLIP_SECONDS * SAMPLE_RATE
+
+
+def _rss_mb():
+    """Resident memory proses ini (MB), dari /proc kalau ada."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _beam_size():
+    """openai-whisper: beam_size=None = greedy; faster-whisper: beam_size=1 = greedy."""
+    return config.TRANSCRIBE_BEAM_SIZE if config.TRANSCRIBE_BEAM_SIZE > 1 else None
+
+
+class TranscriptionEngine:
+    name = "base"
+
+    def __init__(self, model_size=None, threads=None):
+        self.model_size = model_size or config.WHISPER_MODEL
+        self.threads = config.WHISPER_THREADS if threads is None else threads
+        self.model = None
+        self.stats = {}
+
+    def load(self):
+        if self.model is not None:
+            return self
+        print(f"⏳ Loading {self.name} model '{self.model_size}' (pid {os.getpid()})...")
+        rss_before = _rss_mb()
+        started = time.time()
+        self.model = self._load()
+        self.stats.update({
+            'pid': os.getpid(),
+            'engine': self.name,
+            'model': self.model_size,
+            'threads': self.threads,
+            'load_seconds': round(time.time() - started, 2),
+            'model_rss_mb': round(_rss_mb() - rss_before, 1),
+        })
+        print(f"✅ {self.name} Model Loaded! ({self.stats['load_seconds']}s, +{self.stats['model_rss_mb']}MB RSS)")
+        return self
+
+    def transcribe(self, pcm):
+        """`pcm` = array float32 16 kHz mono (lihat app/services/audio.py). Return list [{start, end, word}]."""
+        self.load()
+        return [
+            {'start': float(start), 'end': float(end), 'word': word.strip()}
+            for start, end, word in self._words(pcm)
+        ]
+
+    def transcribe_clips(self, pcm, clips):
+        """
+        Batched inference: tiap clip (lo, hi) sample di `pcm` (maks CLIP_SECONDS)
+        di-decode independen, TRANSCRIBE_BATCH_SIZE clip per forward pass.
+        Return list [{start, end, word}] dengan timestamp di timeline `pcm`.
+        """
+        self.load()
+        return [
+            {'start': float(start), 'end': float(end), 'word': word.strip()}
+            for start, end, word in self._clip_words(pcm, clips)
+        ]
+
+    def _load(self):
+        raise NotImplementedError
+
+    def _words(self, pcm):
+        """Yield (start, end, word) dalam detik."""
+        raise NotImplementedError
+
+    def _clip_words(self, pcm, clips):
+        """Yield (start, end, word) dalam detik di timeline `pcm`."""
+        raise NotImplementedError
+
+
+class WhisperEngine(TranscriptionEngine):
+    name = "whisper"
+
+    def _load(self):
+        import torch
+        import whisper  # Library Whisper Local
+
+        if self.threads > 0:
+            torch.set_num_threads(self.threads)
+        self.threads = torch.get_num_threads()
+        return whisper.load_model(self.model_size)
+
+    def _words(self, pcm):
+        # Transkripsi dengan word_timestamps=True (Fitur sakti!)
+        result = self.model.transcribe(pcm, word_timestamps=True, fp16=False, # fp16=False biar aman di CPU
+                                       beam_size=_beam_size())
+        for segment in result['segments']:
+            for word in segment['words']:
+                yield word['start'], word['end'], word['word']
+
+    def _clip_words(self, pcm, clips):
+        # Mel 30 detik (di-pad) per clip, di-stack jadi satu batch untuk whisper.decode;
+        # timestamp kata lewat alignment cross-attention per clip (sama seperti transcribe())
+        import torch
+        import whisper
+        from whisper.audio import HOP_LENGTH
+        from whisper.timing import add_word_timestamps
+        from whisper.tokenizer import get_tokenizer
+
+        options = whisper.DecodingOptions(fp16=False, beam_size=_beam_size(), without_timestamps=True)
+        n_mels = self.model.dims.n_mels
+        for b in range(0, len(clips), config.TRANSCRIBE_BATCH_SIZE):
+            batch = clips[b:b + config.TRANSCRIBE_BATCH_SIZE]
+            mels = [whisper.log_mel_spectrogram(whisper.pad_or_trim(pcm[lo:hi]), n_mels) for lo, hi in batch]
+            results = whisper.decode(self.model, torch.stack(mels).to(self.model.device), options)
+            for (lo, hi), mel, result in zip(batch, mels, results):
+                # Aturan no-speech bawaan whisper: clip hening jangan diisi teks halu
+                if result.no_speech_prob > 0.6 and result.avg_logprob < -1.0:
+                    continue
+                tokenizer = get_tokenizer(self.model.is_multilingual, num_languages=self.model.num_languages,
+                                          language=result.language, task="transcribe")
+                segment = {'seek': 0, 'start': 0.0, 'end': (hi - lo) / SAMPLE_RATE, 'tokens': result.tokens}
+                add_word_timestamps(segments=[segment], model=self.model, tokenizer=tokenizer, mel=mel,
+                                    num_frames=(hi - lo) // HOP_LENGTH, last_speech_timestamp=0.0)
+                offset = lo / SAMPLE_RATE
+                for word in segment.get('words', []):
+                    yield word['start'] + offset, word['end'] + offset, word['word']
+
+
+class FasterWhisperEngine(TranscriptionEngine):
+    name = "faster-whisper"
+    batched = None
+
+    def _load(self):
+        from faster_whisper import WhisperModel
+
+        # cpu_threads=0 = OMP_NUM_THREADS atau 4 (default CTranslate2); dicatat angka sebenarnya
+        if self.threads <= 0:
+            self.threads = int(os.environ.get("OMP_NUM_THREADS") or 4)
+        return WhisperModel(
+            self.model_size, device="cpu",
+            compute_type=config.TRANSCRIBE_COMPUTE_TYPE,
+            cpu_threads=self.threads,
+        )
+
+    def _words(self, pcm):
+        # VAD sudah dilakukan sendiri (app/services/vad.py), jadi vad_filter bawaan dimatikan
+        segments, _ = self.model.transcribe(pcm, word_timestamps=True, beam_size=config.TRANSCRIBE_BEAM_SIZE, vad_filter=False)
+        for segment in segments:
+            for word in segment.words or []:
+                yield word.start, word.end, word.word
+
+    def _clip_words(self, pcm, clips):
+        # BatchedInferencePipeline: clip_timestamps (sample) di-decode paralel per batch,
+        # tanpa prompt dari clip sebelumnya; timestamp sudah di timeline `pcm`
+        from faster_whisper import BatchedInferencePipeline
+
+        if self.batched is None:
+            self.batched = BatchedInferencePipeline(self.model)
+        segments, _ = self.batched.transcribe(
+            pcm, clip_timestamps=[{'start': lo, 'end': hi} for lo, hi in clips],
+            batch_size=config.TRANSCRIBE_BATCH_SIZE, beam_size=config.TRANSCRIBE_BEAM_SIZE,
+            word_timestamps=True,
+        )
+        for segment in segments:
+            for word in segment.words or []:
+                yield word.start, word.end, word.word
+
+
+ENGINES = {
+    WhisperEngine.name: WhisperEngine,
+    FasterWhisperEngine.name: FasterWhisperEngine,
+}
+
+_engine = None
+
+
+def get_engine():
+    """Engine milik proses ini (satu instance per proses worker)."""
+    global _engine
+    if _engine is None:
+        if config.TRANSCRIBE_ENGINE not in ENGINES:
+            raise Exception(f"Unknown TRANSCRIBE_ENGINE: {config.TRANSCRIBE_ENGINE}")
+        _engine = ENGINES[config.TRANSCRIBE_ENGINE]()
+    return _engine
+
+
+def load_model():
+    return get_engine().load()
+
+
+def stats():
+    engine = _engine
+    return {**(engine.stats if engine else {}), 'loaded': bool(engine and engine.model), 'rss_mb': round(_rss_mb(), 1)}
+
+
+def transcribe_clips(pcm, clips):
+    """
+    Batched word-level timestamp dengan engine yang dikonfigurasi.
+    Return list [{start, end, word}] di timeline `pcm`.
+    """
+    label = f"{len(clips)} clip, {sum(hi - lo for lo, hi in clips) / SAMPLE_RATE:.1f}s audio"
+    print(f"   🎤 {config.TRANSCRIBE_ENGINE} sedang mendengarkan {label} (batch {config.TRANSCRIBE_BATCH_SIZE})...")
+    return get_engine().transcribe_clips(pcm, clips)
+
+
+def _split_clip(pcm, lo, hi, max_samples=CLIP_SAMPLES, search_samples=5 * SAMPLE_RATE, frame=320):
+    """
+    Pecah region [lo, hi) jadi clip <= max_samples (batas window model). Titik potong
+    = frame 20ms paling hening di `search_samples` terakhir sebelum batas, supaya
+    kata tidak terbelah.
+    """
+    clips = []
+    while hi - lo > max_samples:
+        window_lo = lo + max_samples - search_samples
+        window = np.asarray(pcm[window_lo:lo + max_samples], dtype=np.float32)
+        n = len(window) // frame
+        energy = (window[:n * frame].reshape(n, frame) ** 2).mean(axis=1)
+        cut = window_lo + int(np.argmin(energy)) * frame
+        clips.append((lo, cut))
+        lo = cut
+    clips.append((lo, hi))
+    return clips
+
+
+def transcribe_batch(audios, gap_seconds=1.0, use_vad=None):
+    """
+    Transkripsi banyak potongan audio dengan batched inference: tiap potongan
+    (dengan VAD: tiap region bicara) dipecah jadi clip <= CLIP_SECONDS, semua clip
+    dari semua potongan di-decode independen dalam batch TRANSCRIBE_BATCH_SIZE
+    (teks tidak terbawa antar potongan), lalu kata-kata dibagi balik ke potongannya.
+
+    Timestamp kata di-remap balik ke timeline potongan asli.
+    Return list (sejajar dengan `audios`) berisi list kata dengan timestamp relatif potongan.
+    """
+    use_vad = config.TRANSCRIBE_VAD if use_vad is None else use_vad
+
+    # (index potongan, offset clip di potongan (detik), sample clip)
+    segments = []
+    total_samples = 0
+    for i, pcm in enumerate(audios):
+        total_samples += len(pcm)
+        regions = vad.speech_regions(pcm) if use_vad else [(0, len(pcm))]
+        for lo, hi in regions:
+            for clip_lo, clip_hi in _split_clip(pcm, lo, hi):
+                segments.append((i, clip_lo / SAMPLE_RATE, pcm[clip_lo:clip_hi]))
+
+    # Clip disusun di satu buffer (dipisah jeda hening) supaya kata bisa dibagi balik lewat bisect
+    gap = np.zeros(int(gap_seconds * SAMPLE_RATE), dtype=np.float32)
+    spans, clips, pieces, cursor = [], [], [], 0
+    for _, _, samples in segments:
+        spans.append((cursor / SAMPLE_RATE, (cursor + len(samples)) / SAMPLE_RATE))
+        clips.append((cursor, cursor + len(samples)))
+        pieces.extend([samples.astype(np.float32), gap])
+        cursor += len(samples) + len(gap)
+
+    if use_vad and total_samples:
+        print(f"   🔇 VAD: {sum(hi - lo for lo, hi in clips) / SAMPLE_RATE:.1f}s dari {total_samples / SAMPLE_RATE:.1f}s audio masuk model ({len(segments)} clip)")
+
+    words = transcribe_clips(np.concatenate(pieces), clips) if pieces else []
+
+    results = [[] for _ in audios]
+    span_starts = [lo for lo, _ in spans]
+    for w in words:
+        k = bisect_right(span_starts, w['start']) - 1
+        if k < 0 or w['start'] >= spans[k][1]:
+            continue  # kata di jeda antar clip
+        item, offset, _ = segments[k]
+        lo_s, hi_s = spans[k]
+        results[item].append({
+            'start': round(w['start'] - lo_s + offset, 3),
+            'end': round(min(w['end'], hi_s) - lo_s + offset, 3),
+            'word': w['word'],
+        })
+    return results
@@ -0,0 +1,95 @@
+"""
+Helper untuk analisa windowed (map-reduce) video panjang:
+pecah timeline jadi window overlap, potong proxy per window, lalu gabung,
+dedup kandidat di sambungan window dan ranking global.
+"""
+import os
+import subprocess
+
+from app.core import config
+from app.services import source_store
+
+
+def plan_windows(duration, window=None, overlap=None):
+    """Return list (start, end) dalam detik yang menutup [0, duration] dengan overlap."""
+    window = window or config.ANALYSIS_WINDOW_SECONDS
+    overlap = overlap if overlap is not None else config.ANALYSIS_WINDOW_OVERLAP_SECONDS
+    step = max(1, window - overlap)
+
+    windows = []
+    start = 0
+    while True:
+        end = min(duration, start + window)
+        windows.append((start, end))
+        if end >= duration:
+            break
+        start += step
+    return windows
+
+
+def cut_window(video_path, start, end, output_folder):
+    """
+    Potong window dari proxy dengan re-encode (seek akurat, timestamp mulai dari 0).
+    Proxy kecil, jadi re-encode murah; hasil dipakai ulang selama tidak lebih tua
+    dari proxy-nya (proxy yang dibuat ulang ikut memotong ulang window).
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    name = f"window_{int(start)}_{int(end)}"
+    output_path = f"{output_folder}/{name}.mp4"
+    if os.path.exists(output_path) and os.path.getmtime(output_path) >= os.path.getmtime(video_path):
+        return output_path
+
+    # Lock per window: project lain di source yang sama menunggu lalu reuse hasilnya,
+    # window lain tetap bisa dipotong paralel
+    with source_store.source_lock(output_folder, f"{name}.lock"):
+        if os.path.exists(output_path) and os.path.getmtime(output_path) >= os.path.getmtime(video_path):
+            return output_path
+
+        temp_path = f"{output_path}.part.mp4"
+        subprocess.run([
+            'ffmpeg', '-y', '-ss', str(start), '-t', str(end - start), '-i', video_path,
+            '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '32', '-c:a', 'aac', '-b:a', '48k',
+            temp_path
+        ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        os.replace(temp_path, output_path)
+    return output_path
+
+
+def _overlap_ratio(a, b):
+    inter = min(a['end'], b['end']) - max(a['start'], b['start'])
+    if inter <= 0:
+        return 0.0
+    shorter = min(a['end'] - a['start'], b['end'] - b['start'])
+    return inter / shorter if shorter > 0 else 0.0
+
+
+def _score(candidate):
+    """Skor dari Gemini bisa int atau string ("85"); yang tidak valid dianggap 0."""
+    try:
+        return float(candidate.get('score') or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def merge_candidates(candidates, limit, min_overlap=0.5):
+    """
+    candidates: list dict dengan 'start'/'end' absolut (detik) dan 'score'.
+    Kandidat yang overlap >= min_overlap dianggap duplikat (biasanya dari dua window
+    yang bersebelahan); yang skornya lebih tinggi dipertahankan.
+    """
+    ranked = sorted(candidates, key=_score, reverse=True)
+    kept = []
+    for c in ranked:
+        if any(_overlap_ratio(c, k) >= min_overlap for k in kept):
+            continue
+        kept.append(c)
+        if len(kept) >= limit:
+            break
+    return kept
+
+
+def seconds_to_timestamp(seconds):
+    seconds = int(round(seconds))
+    hrs, rem = divmod(seconds, 3600)
+    mins, secs = divmod(rem, 60)
+    return f"{hrs:02}:{mins:02}:{secs:02}"
@@ -1,34 +1,41 @@
 import subprocess
 from celery import Celery
 import os
-import yt_dlp
-import cv2
-import mediapipe as mp
 import ffmpeg
 import json
 import time
 import numpy as np
 import re
 import math
-import whisper  # Library Whisper Local
+from concurrent.futures import ThreadPoolExecutor
 from google import genai
 from google.genai import types
 from celery.schedules import crontab
 
 # --- IMPORT DATABASE ---
 from app.db.database import SessionLocal
-from app.db.models import Project, GeneratedClip, ClipCandidate, User, CreditTransaction
+from app.db.models import Project, GeneratedClip, ClipCandidate, User, CreditTransaction, SocialChannel
 # -----------------------
+from app.core import config
+from app.services import sources, source_store, proxy, gemini_cache, windows, transcript, faces, reframe, render, subtitles, keyframes
 
 celery_app = Celery(
     "worker",
     broker=os.environ.get("CELERY_BROKER_URL", "redis://redis:6379/0"),
     backend=os.environ.get("CELERY_RESULT_BACKEND", "redis://redis:6379/0"),
-    include=['app.tasks.pipeline', 'app.tasks.watcher']
+    include=['app.tasks.pipeline', 'app.tasks.watcher', 'app.tasks.transcribe']
 )
 
-# Variable Global untuk model Whisper (Lazy Loading)
-whisper_model = None
+# Whisper hanya hidup di worker queue transcribe (lihat app/tasks/transcribe.py)
+celery_app.conf.task_routes = {
+    'app.tasks.transcribe.transcribe_batch_task': {'queue': config.TRANSCRIBE_BATCH_QUEUE},
+    'app.tasks.transcribe.*': {'queue': config.TRANSCRIBE_QUEUE},
+}
+
+# Priority per message (Redis: 0 = tertinggi, default). Draft full-quality dikirim
+# dengan priority rendah; prefetch 1 supaya task interaktif bisa menyalip antrian.
+celery_app.conf.broker_transport_options = {'priority_steps': list(range(10)), 'queue_order_strategy': 'priority'}
+celery_app.conf.worker_prefetch_multiplier = 1
 
 # ... import tetap sama ...
 
@@ -56,73 +63,159 @@ def analyze_video_task(self, youtube_url: str, user_id: str = None):
                 project.user_id = user_id
         db.commit()
 
-        # 2. Download
+        # 2. Download (atau reuse dari source store kalau video yang sama sudah pernah diambil)
         self.update_state(state='PROGRESS', meta={'status': 'Downloading...'})
-        video_path, duration = _download_video_with_meta(youtube_url, work_dir)
+        source = source_store.acquire(youtube_url)
         
-        if not video_path: raise Exception("Download failed")
+        if not source: raise Exception("Download failed")
+        video_path, duration = source['path'], source['duration']
 
-        # 3. Gemini Analysis
-        self.update_state(state='PROGRESS', meta={'status': 'AI Mencari Konten Viral...'})
-        candidates = _analyze_smart_context(video_path, duration)
-        
-        if not candidates: raise Exception("Gagal analisa konten viral (Result Kosong)")
+        project = db.query(Project).filter(Project.id == task_id).first()
+        project.source_key = source['key']
+        db.commit()
 
-        print(f"🔍 Gemini menyarankan {len(candidates)} klip raw. Mulai filtering...")
-        
-        saved_count = 0
-        for i, c in enumerate(candidates):
-            s = _time_to_seconds(c.get('start_time', '00:00'))
-            e = _time_to_seconds(c.get('end_time', '00:00'))
-            dur = e - s
-            
-            # DEBUG LOG: Tampilkan apa yang diterima
-            print(f"   📝 Cek Kandidat #{i+1}: {s}s - {e}s (Durasi: {dur}s) - {c.get('title')}")
-
-            # FILTER LEBIH LONGGAR: Minimal 10 detik (sebelumnya 20/30)
-            if dur < 10: 
-                print(f"      ⚠️ SKIP: Terlalu pendek (<10s)")
+        # Transkrip seluruh source dijalankan paralel dengan analisa Gemini (sekali per source)
+        if transcript.load(source['dir']) is None:
+            from app.tasks.transcribe import transcribe_source_task
+            transcribe_source_task.delay(source['dir'])
+
+        # Face track seluruh source juga sekali per source, dipakai semua kandidat saat crop
+        if faces.load_face_track(source['dir']) is None:
+            build_face_track_task.delay(source['dir'])
+
+        # Keyframe index (ffprobe packet scan): seek point, batas segmen GOP, cut stream-copy
+        if keyframes.load_index(video_path) is None:
+            build_keyframe_index_task.delay(video_path)
+
+        # 3. Analysis proxy (rendition kecil khusus upload Gemini)
+        self.update_state(state='PROGRESS', meta={'status': 'Menyiapkan proxy analisa...'})
+        analysis_path = proxy.ensure_proxy(source['dir'], video_path)
+
+        # 4. Gemini Upload (tahap 1). Menunggu PROCESSING & generate ada di poll_analysis_task,
+        # supaya worker tidak tidur memegang slot selama Google memproses video.
+        self.update_state(state='PROGRESS', meta={'status': 'Upload ke AI...'})
+        jobs = _plan_analysis_jobs(analysis_path, duration, source['dir'])
+        jobs = _upload_analysis_jobs(jobs)
+
+        if all(job.get('done') for job in jobs):
+            saved_count = _finish_analysis(db, task_id, jobs)
+            return {"status": "analysis_completed", "candidates_count": saved_count}
+
+        poll_analysis_task.apply_async(args=[task_id, jobs, time.time()], countdown=config.ANALYSIS_POLL_INTERVAL_SECONDS)
+        return {"status": "waiting_for_ai", "jobs": len(jobs)}
+
+    except Exception as e:
+        print(f"🔥 Error: {e}")
+        db.rollback()
+        project = db.query(Project).filter(Project.id == task_id).first()
+        if project: project.status = "failed"; db.commit()
+        return {"status": "failed", "error": str(e)}
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True)
+def poll_analysis_task(self, project_id: str, jobs: list, started_at: float):
+    """
+    Tahap 2 analisa: cek state file di Gemini. Kalau masih PROCESSING, task ini
+    menjadwalkan ulang dirinya sendiri (countdown) dan langsung melepas worker.
+    File yang sudah ACTIVE langsung di-generate.
+    """
+    db = SessionLocal()
+    try:
+        client = _get_gemini_client()
+        ready, processing = [], []
+        for job in jobs:
+            if job.get('done'):
                 continue
-            if dur > 300:
-                print(f"      ⚠️ SKIP: Terlalu panjang (>5m)")
+            if gemini_cache.get_result(job['digest'], PROMPT_VERSION, job['target_clips']):
+                job['done'] = True
                 continue
 
-            # Simpan ke DB
-            candidate = ClipCandidate(
-                project_id=task_id,
-                start_time=s, end_time=e,
-                title=c.get('title', 'Untitled'),
-                description=c.get('caption', 'No description'), # Pakai caption untuk deskripsi
-                viral_score=c.get('score', 85),
-                is_rendered=False
-            )
-            db.add(candidate)
-            saved_count += 1
-        
-        new_project = db.query(Project).filter(Project.id == task_id).first()
-        new_project.status = "analysis_completed"
-        db.commit()
-
-        print(f"✅ Selesai! {saved_count} draft tersimpan di Database.")
+            state = client.files.get(name=job['file_name']).state.name
+            if state == "PROCESSING":
+                processing.append(job)
+            elif state == "FAILED":
+                print(f"   ❌ Gemini gagal memproses {os.path.basename(job['path'])}")
+                gemini_cache.forget_file_name(job['digest'])
+                job['done'] = True
+            else:
+                ready.append(job)
+
+        if ready:
+            with ThreadPoolExecutor(max_workers=config.ANALYSIS_MAX_INFLIGHT) as pool:
+                list(pool.map(_generate_for_job, ready))
+
+        if processing:
+            if time.time() - started_at < config.ANALYSIS_PROCESSING_TIMEOUT_SECONDS:
+                poll_analysis_task.apply_async(args=[project_id, jobs, started_at], countdown=config.ANALYSIS_POLL_INTERVAL_SECONDS)
+                return {"status": "waiting_for_ai", "processing": len(processing)}
+            print(f"❌ Timeout menunggu Gemini process video ({len(processing)} file)")
+
+        saved_count = _finish_analysis(db, project_id, jobs)
         return {"status": "analysis_completed", "candidates_count": saved_count}
 
     except Exception as e:
         print(f"🔥 Error: {e}")
         db.rollback()
-        project = db.query(Project).filter(Project.id == task_id).first()
+        project = db.query(Project).filter(Project.id == project_id).first()
         if project: project.status = "failed"; db.commit()
         return {"status": "failed", "error": str(e)}
     finally:
         db.close()
 
 
+def _finish_analysis(db, project_id, jobs):
+    candidates = _collect_candidates(jobs)
+    if not candidates: raise Exception("Gagal analisa konten viral (Result Kosong)")
+
+    print(f"🔍 Gemini menyarankan {len(candidates)} klip raw. Mulai filtering...")
+    
+    saved_count = 0
+    for i, c in enumerate(candidates):
+        s = _time_to_seconds(c.get('start_time', '00:00'))
+        e = _time_to_seconds(c.get('end_time', '00:00'))
+        dur = e - s
+        
+        # DEBUG LOG: Tampilkan apa yang diterima
+        print(f"   📝 Cek Kandidat #{i+1}: {s}s - {e}s (Durasi: {dur}s) - {c.get('title')}")
+
+        # FILTER LEBIH LONGGAR: Minimal 10 detik (sebelumnya 20/30)
+        if dur < 10: 
+            print(f"      ⚠️ SKIP: Terlalu pendek (<10s)")
+            continue
+        if dur > 300:
+            print(f"      ⚠️ SKIP: Terlalu panjang (>5m)")
+            continue
+
+        # Simpan ke DB
+        candidate = ClipCandidate(
+            project_id=project_id,
+            start_time=s, end_time=e,
+            title=c.get('title', 'Untitled'),
+            description=c.get('caption', 'No description'), # Pakai caption untuk deskripsi
+            viral_score=c.get('score', 85),
+            is_rendered=False
+        )
+        db.add(candidate)
+        saved_count += 1
+    
+    project = db.query(Project).filter(Project.id == project_id).first()
+    project.status = "analysis_completed"
+    db.commit()
+
+    print(f"✅ Selesai! {saved_count} draft tersimpan di Database.")
+    return saved_count
+
+
 @celery_app.task(bind=True)
 def prepare_editor_task(self, candidate_id: int):
     """
-    Menyiapkan data untuk Editor:
-    1. Membuat video crop 9:16 POLOS (tanpa subtitle).
-    2. Menjalankan Whisper untuk dapat JSON Transkrip.
-    3. Menyimpan keduanya ke DB.
+    Menyiapkan data untuk Editor (two-tier, supaya editor cepat terbuka):
+    1. Membuat preview crop 9:16 POLOS kecil (360p, bitrate rendah, faststart).
+    2. Mengambil potongan transkrip source (Whisper sekali per source) untuk window kandidat.
+    3. Menyimpan keduanya ke DB (draft_status = preview_ready).
+    4. Draft full-quality dibuat belakangan oleh prepare_full_draft_task (priority rendah).
     """
     print(f"📝 [Editor Prep] Preparing Candidate ID: {candidate_id}")
     db = SessionLocal()
@@ -133,33 +226,47 @@ def prepare_editor_task(self, candidate_id: int):
         
         project_id = candidate.project_id
         work_dir = f"downloads/{project_id}"
-        video_path = f"{work_dir}/source.mp4"
-        
-        if not os.path.exists(video_path): raise Exception("Source video missing.")
-
-        # Nama File Draft
-        draft_filename = f"draft_{candidate.id}.mp4"
-        draft_path = f"{work_dir}/{draft_filename}"
-        
-        # A. BUAT VIDEO POLOS (CROP ONLY)
-        # Reuse logika crop tapi tanpa subtitle filter
-        print("   ✂️ Creating Clean Draft Video...")
-        segmen = {'start': candidate.start_time, 'end': candidate.end_time}
-        _create_clean_crop(video_path, segmen, draft_path)
-        
-        # B. TRANSKRIPSI WHISPER (JSON)
+        source_dir = source_store.source_dir_for(candidate.project)
+
+        # A. PREVIEW POLOS (CROP ONLY, 360p). Draft full-quality yang sudah jadi dipakai ulang,
+        # preview yang sudah ada juga (request prepare berulang tidak render/antri ulang)
+        full_ready = candidate.draft_status == "ready" and candidate.draft_video_path and os.path.exists(candidate.draft_video_path)
+        preview_ready = candidate.preview_video_path and os.path.exists(candidate.preview_video_path)
+        if not full_ready and not preview_ready:
+            print("   ✂️ Creating Preview Draft (360p)...")
+            preview_filename = f"preview_{candidate.id}.mp4"
+            # Dari rendition lokal (<= 360p di mode sections): download section hi-res
+            # hanya untuk draft full-quality di prepare_full_draft_task
+            _render_clean_draft(candidate, source_dir, f"{work_dir}/{preview_filename}", render.PREVIEW_PROFILE, local_only=True)
+            candidate.preview_video_path = f"downloads/{project_id}/{preview_filename}"
+            candidate.draft_status = "preview_ready"
+        # preview_ready = draft full-quality masih antri/jalan; failed / kosong = perlu dijadwalkan
+        full_pending = candidate.draft_status == "preview_ready" and preview_ready
+
+        # B. TRANSKRIP (JSON): slice dari transkrip seluruh source, bukan Whisper ulang.
+        # Transkrip yang sudah ada (mungkin hasil edit user) tidak ditimpa.
         print("   🎤 Extracting Transcript JSON...")
-        # Ekstrak audio dari draft video biar cepat
-        temp_audio = f"{work_dir}/temp_audio_{candidate.id}.wav"
-        subprocess.run(['ffmpeg', '-y', '-i', draft_path, '-vn', '-acodec', 'pcm_s16le', '-ar', '16000', '-ac', '1', temp_audio], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        
-        transcript_json = _transcribe_with_whisper(temp_audio)
-        if os.path.exists(temp_audio): os.remove(temp_audio)
-        
-        # C. SIMPAN KE DB
-        candidate.draft_video_path = f"downloads/{project_id}/{draft_filename}"
-        candidate.transcript_data = transcript_json
+        if candidate.transcript_data is not None:
+            transcript_json = candidate.transcript_data
+        else:
+            transcript_json = _candidate_words(source_dir, candidate.start_time, candidate.end_time)
+
+        # C. SIMPAN KE DB (editor sudah bisa dibuka dengan preview)
+        if transcript_json is not None:
+            candidate.transcript_data = transcript_json
         db.commit()
+
+        # D. Draft full-quality di belakang, kalah prioritas dari task interaktif
+        if not full_ready and not full_pending:
+            prepare_full_draft_task.apply_async(args=[candidate_id], priority=config.DRAFT_FULL_PRIORITY)
+
+        if transcript_json is None:
+            # Transkrip source belum selesai: transkripsi window kandidat ini saja,
+            # di-batch bersama request editor lain yang datang berdekatan
+            from app.tasks.transcribe import enqueue_candidate
+            enqueue_candidate(candidate_id)
+            print(f"   ⏳ Preview siap, transkrip Candidate #{candidate_id} masuk antrian batch")
+            return {"status": "waiting_for_transcript"}
         
         print(f"   ✅ Editor Data Ready for Candidate #{candidate_id}")
         return {"status": "ready_for_editing", "transcript_len": len(transcript_json)}
@@ -171,9 +278,56 @@ def prepare_editor_task(self, candidate_id: int):
         db.close()
 
 
+@celery_app.task(bind=True)
+def prepare_full_draft_task(self, candidate_id: int):
+    """Tier 2 editor: draft crop 9:16 POLOS full-quality (dipakai render final, lihat _overlay_subtitles)."""
+    print(f"🎞️ [Full Draft] Candidate ID: {candidate_id}")
+    db = SessionLocal()
+    try:
+        candidate = db.query(ClipCandidate).filter(ClipCandidate.id == candidate_id).first()
+        if not candidate: raise Exception("Candidate not found")
+
+        draft_filename = f"draft_{candidate.id}.mp4"
+        _render_clean_draft(candidate, source_store.source_dir_for(candidate.project),
+                            f"downloads/{candidate.project_id}/{draft_filename}")
+
+        candidate.draft_video_path = f"downloads/{candidate.project_id}/{draft_filename}"
+        candidate.draft_status = "ready"
+        db.commit()
+        print(f"   ✅ Full draft siap untuk Candidate #{candidate_id}")
+        return {"status": "ready", "path": candidate.draft_video_path}
+
+    except Exception as e:
+        print(f"❌ Full Draft Error: {e}")
+        db.rollback()
+        candidate = db.query(ClipCandidate).filter(ClipCandidate.id == candidate_id).first()
+        if candidate and candidate.draft_status != "ready":
+            candidate.draft_status = "failed"; db.commit()
+        return {"status": "failed", "error": str(e)}
+    finally:
+        db.close()
+
+
+def _render_clean_draft(candidate, source_dir, output_path, profile=None, local_only=False):
+    """
+    Crop 9:16 polos untuk window kandidat (mode sections: hi-res hanya di-download untuk window ini).
+    `local_only` = pakai file lokal yang menutup seluruh timeline (source.mp4 / analysis.mp4),
+    tanpa menunggu download section hi-res; cukup untuk preview kecil.
+    """
+    if local_only:
+        media_path = sources.local_media_path(source_dir)
+        if not media_path: raise Exception("Source video missing.")
+        window = {'path': media_path, 'start': candidate.start_time, 'end': candidate.end_time}
+    else:
+        window = sources.resolve_window(source_dir, candidate.project.youtube_url, candidate.start_time, candidate.end_time)
+    segmen = {'start': window['start'], 'end': window['end']}
+    face_center = _window_face_center(source_dir, candidate.start_time, candidate.end_time)
+    crop_path = _window_crop_path(source_dir, candidate.start_time, candidate.end_time)
+    return _create_clean_crop(window['path'], segmen, output_path, face_center, crop_path, profile)
+
 
 @celery_app.task(bind=True)
-def render_single_clip_task(self, candidate_id: int):
+def render_single_clip_task(self, candidate_id: int, allow_transcribe: bool = True, platforms: list = None):
     print(f"🎬 [Render Task] Processing Candidate ID: {candidate_id}")
     db = SessionLocal()
     CREDITS_PER_RENDER = 1
@@ -194,40 +348,44 @@ def render_single_clip_task(self, candidate_id: int):
         
         project_id = candidate.project_id
         work_dir = f"downloads/{project_id}"
-        video_path = f"{work_dir}/source.mp4"
-        
-        if not os.path.exists(video_path): raise Exception("File video master hilang.")
+        source_dir = source_store.source_dir_for(project)
 
         clip_filename = f"render_{candidate.id}.mp4"
-        segmen = {'start': candidate.start_time, 'end': candidate.end_time}
+        # Varian platform di-encode dari decode yang sama dengan klip utama
+        platforms = render.profiles_for(candidate.end_time - candidate.start_time, _render_platforms(db, user, platforms))
+        variants = {platform: f"{work_dir}/render_{candidate.id}_{platform}.mp4" for platform in platforms}
         
-        # PANGGIL FUNGSI SMART CROP BARU (YANG PAKAI WHISPER)
-        result_path = _smart_crop_segment(video_path, segmen, work_dir, clip_filename)
+        # Subtitle: pakai transkrip tersimpan di kandidat (hasil editor, mungkin sudah diedit user),
+        # kalau belum ada baru ambil dari transkrip source
+        if candidate.transcript_data is not None:
+            words = candidate.transcript_data
+        else:
+            words = _candidate_words(source_dir, candidate.start_time, candidate.end_time)
+
+        if words is None and allow_transcribe:
+            # Worker render tidak memegang Whisper: transkripsi di queue transcribe, lalu render ulang
+            from app.tasks.transcribe import transcribe_source_task
+            (transcribe_source_task.si(source_dir) | render_single_clip_task.si(candidate_id, allow_transcribe=False, platforms=platforms)).delay()
+            print(f"   ⏳ Menunggu transkrip source untuk Candidate #{candidate_id}")
+            return {"status": "waiting_for_transcript"}
+        if words is None:
+            raise Exception("Transkrip source tidak tersedia")
+
+        draft_path = candidate.draft_video_path
+        if draft_path and os.path.exists(draft_path):
+            # Draft editor sudah berisi crop 9:16: cukup overlay subtitle, audio di-copy
+            result_path = _overlay_subtitles(draft_path, work_dir, clip_filename, words, variants)
+        else:
+            window = sources.resolve_window(source_dir, project.youtube_url, candidate.start_time, candidate.end_time)
+            segmen = {'start': window['start'], 'end': window['end']}
+            face_center = _window_face_center(source_dir, candidate.start_time, candidate.end_time)
+            crop_path = _window_crop_path(source_dir, candidate.start_time, candidate.end_time)
+            result_path = _smart_crop_segment(window['path'], segmen, work_dir, clip_filename, words, face_center, crop_path, variants)
         
         if result_path:
-            final_clip = GeneratedClip(
-                project_id=project_id,
-                file_path=result_path,
-                title=candidate.title,
-                credits_used=CREDITS_PER_RENDER
-            )
-            db.add(final_clip)
-            candidate.is_rendered = True
-            
-            # Deduct credits
-            if user:
-                user.credits_balance -= CREDITS_PER_RENDER
-                transaction = CreditTransaction(
-                    user_id=user.id,
-                    amount=-CREDITS_PER_RENDER,
-                    action="render",
-                    description=f"Rendered clip: {candidate.title}"
-                )
-                db.add(transaction)
-                print(f"   💰 Deducted {CREDITS_PER_RENDER} credit from user {user.id[:8]}...")
-            
+            _save_rendered_clip(db, candidate, user, result_path, variants, CREDITS_PER_RENDER)
             db.commit()
-            return {"status": "completed", "path": result_path, "credits_used": CREDITS_PER_RENDER}
+            return {"status": "completed", "path": result_path, "variants": list(variants), "credits_used": CREDITS_PER_RENDER}
         else:
             raise Exception("Gagal merender video")
 
@@ -238,157 +396,366 @@ def render_single_clip_task(self, candidate_id: int):
         db.close()
 
 
-# --- HELPER FUNCTIONS (WHISPER INTEGRATION) ---
-
-def _transcribe_with_whisper(audio_path):
+@celery_app.task(bind=True)
+def render_project_task(self, project_id: str, candidate_ids: list, allow_transcribe: bool = True, platforms: list = None):
     """
-    Menggunakan Whisper Local untuk mendapatkan Word-Level Timestamp.
+    Render banyak kandidat satu project sekaligus:
+    1. Kandidat diurutkan sesuai timeline, lalu yang berdekatan digabung jadi batch.
+    2. Transkrip & face track source di-load sekali untuk semua kandidat.
+    3. Kandidat yang sudah punya draft editor cukup overlay subtitle di atas draft.
+    4. Sisanya per batch = satu proses ffmpeg: window gabungan di-decode sekali, tiap klip
+       (plus varian platform-nya) di-encode ke output masing-masing.
+    Kredit tetap dipotong per klip yang berhasil.
     """
-    global whisper_model
-    if whisper_model is None:
-        print("⏳ Loading Whisper Model (Lazy Load)...")
-        whisper_model = whisper.load_model("small")
-        print("✅ Whisper Model Loaded!")
-    
-    print(f"   🎤 Whisper sedang mendengarkan {os.path.basename(audio_path)}...")
-    
-    # Transkripsi dengan word_timestamps=True (Fitur sakti!)
-    result = whisper_model.transcribe(audio_path, word_timestamps=True, fp16=False) # fp16=False biar aman di CPU
-    
-    # Kita butuh daftar kata-katanya
-    words_list = []
-    for segment in result['segments']:
-        for word in segment['words']:
-            words_list.append({
-                'start': word['start'],
-                'end': word['end'],
-                'word': word['word'].strip()
+    print(f"🎬 [Batch Render] Project {project_id}: {len(candidate_ids)} kandidat")
+    db = SessionLocal()
+    CREDITS_PER_RENDER = 1
+
+    try:
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if not project: raise Exception("Project not found")
+
+        candidates = db.query(ClipCandidate).filter(
+            ClipCandidate.project_id == project_id,
+            ClipCandidate.id.in_(candidate_ids)
+        ).order_by(ClipCandidate.start_time).all()
+        if not candidates: raise Exception("No candidates to render")
+
+        # Check user credits (untuk semua klip sekaligus)
+        user = None
+        needed = CREDITS_PER_RENDER * len(candidates)
+        if project.user_id:
+            user = db.query(User).filter(User.id == project.user_id).first()
+            if user and user.credits_balance < needed:
+                raise Exception(f"Insufficient credits. Need {needed}, have {user.credits_balance}")
+
+        work_dir = f"downloads/{project_id}"
+        source_dir = source_store.source_dir_for(project)
+
+        requested_platforms = _render_platforms(db, user, platforms)
+
+        # Transkrip source: load sekali, slice per kandidat
+        source_words = transcript.load(source_dir)
+        if source_words is None and allow_transcribe and any(c.transcript_data is None for c in candidates):
+            from app.tasks.transcribe import transcribe_source_task
+            (transcribe_source_task.si(source_dir) | render_project_task.si(project_id, candidate_ids, allow_transcribe=False, platforms=platforms)).delay()
+            print(f"   ⏳ Menunggu transkrip source untuk Project {project_id}")
+            return {"status": "waiting_for_transcript"}
+
+        rendered, failed, jobs = [], [], []
+        for candidate in candidates:
+            if candidate.transcript_data is not None:
+                words = candidate.transcript_data
+            elif source_words is not None:
+                words = transcript.slice_words(source_words, candidate.start_time, candidate.end_time)
+            else:
+                print(f"   ⚠️ Transkrip tidak tersedia untuk Candidate #{candidate.id}, skip")
+                failed.append(candidate.id)
+                continue
+
+            clip_filename = f"render_{candidate.id}.mp4"
+            clip_platforms = render.profiles_for(candidate.end_time - candidate.start_time, requested_platforms)
+            variants = {p: f"{work_dir}/render_{candidate.id}_{p}.mp4" for p in clip_platforms}
+
+            draft_path = candidate.draft_video_path
+            if draft_path and os.path.exists(draft_path):
+                # Draft editor sudah berisi crop 9:16: overlay subtitle saja, tidak ikut batch decode
+                result_path = _overlay_subtitles(draft_path, work_dir, clip_filename, words, variants)
+                if result_path:
+                    _save_rendered_clip(db, candidate, user, result_path, variants, CREDITS_PER_RENDER)
+                    db.commit()
+                    rendered.append(candidate.id)
+                else:
+                    failed.append(candidate.id)
+                continue
+
+            window = sources.resolve_window(source_dir, project.youtube_url, candidate.start_time, candidate.end_time)
+            jobs.append({
+                'candidate': candidate, 'words': words, 'filename': clip_filename, 'variants': variants,
+                'path': window['path'], 'start': window['start'], 'end': window['end'],
             })
+
+        for batch in render.plan_batches(jobs):
+            video_path = jobs[batch[0]]['path']
+            probe = sources.cached_probe(video_path)
+            clips, temp_paths = [], []
+            for i in batch:
+                job = jobs[i]
+                candidate = job['candidate']
+                face_center = _window_face_center(source_dir, candidate.start_time, candidate.end_time)
+                crop_path = _window_crop_path(source_dir, candidate.start_time, candidate.end_time)
+                # Nama instance crop unik per klip: semua sendcmd di filtergraph yang sama
+                filters, temps = _clip_filters(video_path, probe, job, work_dir, job['filename'], job['words'],
+                                               face_center, crop_path, f"crop@reframe{candidate.id}")
+                temp_paths += temps
+                clips.append({'start': job['start'], 'end': job['end'], 'filters': filters,
+                              'output': f"{work_dir}/{job['filename']}", 'variants': job['variants']})
+
+            print(f"   🔥 Batch {len(batch)} klip ({min(c['start'] for c in clips):.1f}-{max(c['end'] for c in clips):.1f}s) dalam satu ffmpeg...")
+            try:
+                render.render_batch(video_path, clips, probe)
+            except subprocess.CalledProcessError as e:
+                print(f"   ❌ FFmpeg Gagal (batch): {e.stderr.decode('utf8')}")
+                failed += [jobs[i]['candidate'].id for i in batch]
+                continue
+            finally:
+                _remove_files(temp_paths)
+
+            for i, clip in zip(batch, clips):
+                _save_rendered_clip(db, jobs[i]['candidate'], user, clip['output'], clip['variants'], CREDITS_PER_RENDER)
+                rendered.append(jobs[i]['candidate'].id)
+            db.commit()
+
+        print(f"✅ Batch render selesai: {len(rendered)} sukses, {len(failed)} gagal")
+        return {"status": "completed" if not failed else "partial", "rendered": rendered, "failed": failed,
+                "credits_used": CREDITS_PER_RENDER * len(rendered)}
+
+    except Exception as e:
+        print(f"❌ Batch Render Error: {e}")
+        return {"status": "failed", "error": str(e)}
+    finally:
+        db.close()
+
+
+def _render_platforms(db, user, requested=None):
+    """
+    Varian platform untuk satu request render: yang diminta eksplisit, atau default
+    platform tempat user publish (channel sosial yang terhubung) + RENDER_VARIANTS.
+    """
+    if requested is not None:
+        return list(requested)
+    platforms = list(config.RENDER_VARIANTS)
+    if user:
+        channels = db.query(SocialChannel.platform).filter(
+            SocialChannel.user_id == user.id,
+            SocialChannel.is_connected == True,
+            SocialChannel.platform.in_(list(render.PROFILES))
+        ).all()
+        platforms += [platform for (platform,) in channels if platform not in platforms]
+    return platforms
+
+def _save_rendered_clip(db, candidate, user, result_path, variants, credits):
+    """Simpan GeneratedClip (+ varian platform), tandai kandidat, lalu potong kredit."""
+    final_clip = GeneratedClip(
+        project_id=candidate.project_id,
+        file_path=result_path,
+        title=candidate.title,
+        credits_used=credits
+    )
+    db.add(final_clip)
+    db.flush()
+    for platform, variant_path in variants.items():
+        if os.path.exists(variant_path):
+            db.add(GeneratedClip(
+                project_id=candidate.project_id,
+                file_path=variant_path,
+                title=candidate.title,
+                credits_used=0,
+                platform=platform,
+                parent_clip_id=final_clip.id
+            ))
+    candidate.is_rendered = True
     
-    return words_list
+    # Deduct credits
+    if user:
+        user.credits_balance -= credits
+        transaction = CreditTransaction(
+            user_id=user.id,
+            amount=-credits,
+            action="render",
+            description=f"Rendered clip: {candidate.title}"
+        )
+        db.add(transaction)
+        print(f"   💰 Deducted {credits} credit from user {user.id[:8]}...")
+    return final_clip
 
-def _json_to_srt_one_word(words_json, output_path):
+
+# --- HELPER FUNCTIONS (TRANSKRIP & SUBTITLE) ---
+
+def _candidate_words(source_dir, start, end):
+    """Kata-kata untuk window [start, end] relatif ke awal klip, None kalau transkrip source belum ada."""
+    words = transcript.load(source_dir)
+    if words is None:
+        return None
+    return transcript.slice_words(words, start, end)
+
+def _window_face_center(source_dir, start, end):
+    """Center X wajah (relatif 0..1) dari face track source, None kalau track belum dibuat."""
+    track = faces.load_face_track(source_dir)
+    if track is None:
+        return None
+    center = faces.window_center(track, start, end)
+    return 0.5 if center is None else center
+
+def _window_crop_path(source_dir, start, end):
     """
-    Konversi data Whisper ke SRT format 'Satu Kata Satu Waktu'.
+    Lintasan crop dinamis (per shot, dihaluskan) untuk window [start, end].
+    Cut shot di-lookup dari shots.npy source (dibuat bersama face track), tanpa decode ulang.
+    None = pakai crop statis (mode static, face track belum ada, atau tidak ada wajah).
     """
-    def sec_to_srt_fmt(seconds):
-        ms = int((seconds % 1) * 1000)
-        seconds = int(seconds)
-        mins, secs = divmod(seconds, 60)
-        hrs, mins = divmod(mins, 60)
-        return f"{hrs:02}:{mins:02}:{secs:02},{ms:03}"
-
-    with open(output_path, "w", encoding='utf-8') as f:
-        counter = 1
-        for w in words_json:
-            start = sec_to_srt_fmt(w['start'])
-            end = sec_to_srt_fmt(w['end'])
-            text = w['word']
-            
-            # Tulis block SRT untuk 1 kata ini
-            f.write(f"{counter}\n")
-            f.write(f"{start} --> {end}\n")
-            f.write(f"{text}\n\n")
-            counter += 1
-            
-    return True
-
-def _smart_crop_segment(video_path, segmen, output_folder, filename):
+    if config.REFRAME_MODE != "dynamic":
+        return None
+    track = faces.load_face_track(source_dir)
+    if track is None:
+        return None
+    shots = faces.load_shots(source_dir)
+    if shots is not None:
+        cuts = reframe.window_cuts(shots, start, end)
+    else:
+        # Face track lama tanpa shots.npy: deteksi khusus window ini, lalu lengkapi di belakang
+        media_path = sources.local_media_path(source_dir)
+        if not media_path:
+            return None
+        build_face_track_task.delay(source_dir)
+        cuts = reframe.detect_shots(media_path, start, end - start)
+    return reframe.plan_crop_path(track, start, end, cuts)
+
+def _smart_crop_segment(video_path, segmen, output_folder, filename, words=None, face_center=None, crop_path=None, variants=None):
     start, end = segmen['start'], segmen['end']
-    duration = end - start
-    
-    temp_cut_path = f"{output_folder}/temp_{filename}"
     output_filename = f"{output_folder}/{filename}"
-    srt_path = f"{output_folder}/{filename}.srt"
 
-    # 1. CUTTING TEMP VIDEO
-    print(f"   ✂️ Cutting temp video ({start}-{end})...")
-    subprocess.run(['ffmpeg', '-y', '-ss', str(start), '-t', str(duration), '-i', video_path, '-c', 'copy', temp_cut_path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    probe = sources.cached_probe(video_path)
+    filters, temp_paths = _clip_filters(video_path, probe, segmen, output_folder, filename, words, face_center, crop_path)
 
-    # 2. GENERATE SUBTITLE (PAKAI WHISPER)
+    # CUT + CROP + SUBTITLE dalam satu pass ffmpeg
+    print(f"   🔥 Burning Dynamic Subtitles ({start:.1f}-{end:.1f})...")
     try:
-        # Kita butuh audio-only untuk Whisper (biar cepat)
-        temp_audio_path = f"{output_folder}/temp_audio_{filename}.wav"
-        subprocess.run(['ffmpeg', '-y', '-i', temp_cut_path, '-vn', '-acodec', 'pcm_s16le', '-ar', '16000', '-ac', '1', temp_audio_path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        
-        # Panggil Whisper
-        words_data = _transcribe_with_whisper(temp_audio_path)
-        
-        # Buat SRT Satu Kata
-        _json_to_srt_one_word(words_data, srt_path)
-        
-        # Bersihkan audio temp
-        if os.path.exists(temp_audio_path): os.remove(temp_audio_path)
+        render.render_window(video_path, start, end, output_filename, filters, probe, variants)
+        print(f"   ✅ Sukses: {filename}")
+        return output_filename
+    except subprocess.CalledProcessError as e:
+        print(f"   ❌ FFmpeg Gagal: {e.stderr.decode('utf8')}")
+        return None
+    finally:
+        _remove_files(temp_paths)
+
+def _clip_filters(video_path, probe, segmen, output_folder, filename, words=None, face_center=None, crop_path=None, crop_target="crop@reframe"):
+    """
+    Filter video (crop 9:16 + subtitle) untuk satu klip, waktu relatif ke awal klip.
+    Return (filters, file sementara yang harus dihapus setelah encode).
+    """
+    start, end = segmen['start'], segmen['end']
+    duration = end - start
+    cmd_path = f"{output_folder}/{filename}.cmd"
+
+    # 1. GENERATE SUBTITLE (dari transkrip yang sudah ada; Whisper tidak jalan di worker render)
+    sub_path = _write_subtitles(words, duration, f"{output_folder}/{filename}")
+
+    # 2. FACE TRACKING (lookup face track source; scan ulang hanya kalau track belum ada)
+    crop = _window_crop(video_path, start, duration, probe, face_center, crop_path, cmd_path, crop_target)
+    return [crop, render.subtitle_filter(sub_path)], [cmd_path]
+
+def _write_subtitles(words, duration, output_base):
+    """
+    Tulis subtitle untuk klip: ASS karaoke (default) atau SRT satu kata (SUBTITLE_FORMAT=srt).
+    Return path file subtitle yang ditulis.
+    """
+    try:
+        if words is None: raise Exception("Transkrip tidak tersedia")
+
+        if config.SUBTITLE_FORMAT == "ass":
+            sub_path = f"{output_base}.ass"
+            events = subtitles.write_ass(words, sub_path)
+            print(f"   📝 ASS karaoke: {len(words)} kata -> {events} baris")
+        else:
+            # Buat SRT Satu Kata
+            sub_path = f"{output_base}.srt"
+            subtitles.write_srt_one_word(words, sub_path)
+        return sub_path
         
     except Exception as e:
-        print(f"❌ Whisper Error: {e}. Fallback to dummy sub.")
-        _create_srt("Error Subtitle", duration, srt_path)
-
-    # 3. FACE TRACKING
-    center_x = _scan_face_average(temp_cut_path)
-    cap = cv2.VideoCapture(temp_cut_path)
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)); height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    cap.release()
-    
-    target_width = int(height * 9 / 16)
-    x_start = int(center_x - (target_width // 2))
-    x_start = max(0, min(x_start, width - target_width))
+        print(f"❌ Subtitle Error: {e}. Fallback to dummy sub.")
+        sub_path = f"{output_base}.srt"
+        _create_srt("Error Subtitle", duration, sub_path)
+        return sub_path
 
-    print(f"   🔥 Burning Dynamic Subtitles...")
-    abs_srt_path = os.path.abspath(srt_path)
-    
-    # Style Baru: Font Lebih Besar & Kuning Terang (Supaya 1 kata kelihatan jelas)
-    # Alignment 10 (Middle Center) atau 2 (Bottom Center). Kita pakai 2 (Bottom).
-    style = "Fontname=Liberation Sans,Fontsize=20,PrimaryColour=&H00FFFF,BorderStyle=3,BackColour=&H80000000,Outline=0,Shadow=0,Alignment=2,MarginV=60,Bold=1"
-
-    command = [
-        'ffmpeg', '-y',
-        '-i', temp_cut_path,
-        '-vf', f"crop={target_width}:{height}:{x_start}:0,subtitles='{abs_srt_path}':force_style='{style}',format=yuv420p",
-        '-c:v', 'libx264', '-c:a', 'aac', '-b:a', '128k', '-preset', 'ultrafast',
-        output_filename
-    ]
+def _overlay_subtitles(draft_path, output_folder, filename, words=None, variants=None):
+    """Render final dari draft editor: satu encode overlay subtitle, tanpa cut/crop ulang."""
+    output_filename = f"{output_folder}/{filename}"
+    sub_path = _write_subtitles(words, sources.cached_probe(draft_path)['duration'], f"{output_folder}/{filename}")
 
+    print(f"   🔥 Overlay subtitle di atas draft {os.path.basename(draft_path)}...")
     try:
-        subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        if os.path.exists(temp_cut_path): os.remove(temp_cut_path)
+        render.render_overlay(draft_path, output_filename, [render.subtitle_filter(sub_path)], variants)
         print(f"   ✅ Sukses: {filename}")
         return output_filename
     except subprocess.CalledProcessError as e:
         print(f"   ❌ FFmpeg Gagal: {e.stderr.decode('utf8')}")
         return None
 
-# --- HELPER LAIN (GEMINI UNTUK ANALISIS) TETAP SAMA ---
+def _remove_files(paths):
+    for path in paths:
+        if os.path.exists(path): os.remove(path)
 
-def _analyze_smart_context(video_path, duration):
-    print(f"   📊 Analisis Gemini (Durasi: {duration}s)")
+def _create_clean_crop(video_path, segmen, output_path, face_center=None, crop_path=None, profile=None):
+    """
+    Crop 9:16 POLOS (tanpa subtitle) untuk preview di editor.
+    """
+    start, end = segmen['start'], segmen['end']
+    cmd_path = f"{output_path}.cmd"
+
+    probe = sources.cached_probe(video_path)
+    crop = _window_crop(video_path, start, end - start, probe, face_center, crop_path, cmd_path)
     try:
-        client = genai.Client()
-        video_file = client.files.upload(file=video_path)
-        
-        # Tunggu processing dengan timeout safety
-        start_wait = time.time()
-        while video_file.state.name == "PROCESSING":
-            if time.time() - start_wait > 600: # Timeout 10 menit
-                print("❌ Timeout menunggu Gemini process video")
-                return None
-            time.sleep(5)
-            video_file = client.files.get(name=video_file.name)
-
-        if video_file.state.name == "FAILED": 
-            print("❌ Video processing failed di sisi Google.")
-            return None
+        return render.render_window(video_path, start, end, output_path, [crop], probe, profile=profile)
+    except subprocess.CalledProcessError as e:
+        raise Exception(f"FFmpeg Gagal (clean crop): {e.stderr.decode('utf8')}")
+    finally:
+        if os.path.exists(cmd_path): os.remove(cmd_path)
 
-        target_clips = max(3, min(15, math.ceil(duration / 120)))
-        
-        # PROMPT YANG LEBIH STABIL
-        prompt = f"""
+def _window_crop(video_path, start, duration, probe, face_center, crop_path, cmd_path, crop_target="crop@reframe"):
+    """Filter crop untuk window; tanpa face track, scan wajah langsung di window file source."""
+    width, height = probe['width'], probe['height']
+    if face_center is not None:
+        center_x = face_center * width
+    else:
+        center_x = faces.scan_face_average(video_path, start, duration, probe=probe)
+    return render.crop_filter(width, height, center_x, crop_path, cmd_path, crop_target)
+
+# --- HELPER LAIN (GEMINI UNTUK ANALISIS) TETAP SAMA ---
+
+# Naikkan kalau prompt berubah, supaya hasil cache lama tidak dipakai
+PROMPT_VERSION = "v11"
+
+# Client Gemini dipakai ulang selama proses worker hidup
+gemini_client = None
+
+def _get_gemini_client():
+    global gemini_client
+    if gemini_client is None:
+        gemini_client = genai.Client()
+    return gemini_client
+
+def _get_or_upload_gemini_file(client, video_path, digest):
+    """
+    Reuse file yang sudah pernah di-upload (selama belum expire di server),
+    kalau tidak ada baru upload.
+    """
+    cached_name = gemini_cache.get_file_name(digest)
+    if cached_name:
+        try:
+            video_file = client.files.get(name=cached_name)
+            if video_file.state.name != "FAILED":
+                print(f"   ♻️ Reuse Gemini file: {cached_name}")
+                return video_file
+        except Exception as e:
+            print(f"   ⚠️ Gemini file cache stale ({cached_name}): {e}")
+        gemini_cache.forget_file_name(digest)
+
+    video_file = client.files.upload(file=video_path)
+    gemini_cache.set_file_name(digest, video_file.name)
+    return video_file
+
+def _build_analysis_prompt(target_clips):
+    # PROMPT YANG LEBIH STABIL
+    return f"""
         You are an AI Video Editor. Analyze this video.
         Task: Find {target_clips} interesting segments (viral clips).
         
         Constraints:
         - Clip duration: 30s - 180s.
         - Language: Use the SAME language as the video audio for titles/captions.
+        - Score: 0-100, how likely the clip goes viral.
         
         Output Format: JSON List.
         [
@@ -396,14 +763,57 @@ def _analyze_smart_context(video_path, duration):
                 "start_time": "MM:SS", 
                 "end_time": "MM:SS", 
                 "title": "Interesting Title", 
-                "caption": "Summary"
+                "caption": "Summary",
+                "score": 85
             }}
         ]
         """
-        
+
+def _plan_analysis_jobs(video_path, duration, source_dir):
+    """
+    Satu job = satu file yang dianalisa Gemini. Video panjang dipecah jadi
+    window overlap (map-reduce), sisanya satu job untuk seluruh video.
+    """
+    if duration <= config.ANALYSIS_WINDOW_THRESHOLD_SECONDS:
+        target_clips = max(3, min(15, math.ceil(duration / 120)))
+        return [{'path': video_path, 'start': 0, 'end': duration, 'target_clips': target_clips}]
+
+    plan = windows.plan_windows(duration)
+    per_window_clips = max(3, min(10, math.ceil(config.ANALYSIS_WINDOW_SECONDS / 120)))
+    window_dir = f"{source_dir}/analysis_windows"
+    print(f"   🪟 Windowed analysis: {len(plan)} window, maks {config.ANALYSIS_MAX_INFLIGHT} paralel")
+    return [
+        {'path': windows.cut_window(video_path, w_start, w_end, window_dir),
+         'start': w_start, 'end': w_end, 'target_clips': per_window_clips}
+        for w_start, w_end in plan
+    ]
+
+def _upload_job(job):
+    job['digest'] = gemini_cache.content_hash(job['path'])
+    if gemini_cache.get_result(job['digest'], PROMPT_VERSION, job['target_clips']):
+        print(f"   ♻️ Analysis cache HIT {os.path.basename(job['path'])}")
+        job['done'] = True
+        return job
+
+    video_file = _get_or_upload_gemini_file(_get_gemini_client(), job['path'], job['digest'])
+    job['file_name'] = video_file.name
+    return job
+
+def _upload_analysis_jobs(jobs):
+    with ThreadPoolExecutor(max_workers=config.ANALYSIS_MAX_INFLIGHT) as pool:
+        return list(pool.map(_upload_job, jobs))
+
+def _generate_for_job(job):
+    """
+    Generate untuk satu file yang sudah ACTIVE. Hasil langsung disimpan ke cache,
+    jadi window yang sudah selesai tidak hilang walau window lain gagal.
+    """
+    try:
+        client = _get_gemini_client()
+        video_file = client.files.get(name=job['file_name'])
         response = client.models.generate_content(
             model='gemini-2.0-flash', 
-            contents=[video_file, prompt], 
+            contents=[video_file, _build_analysis_prompt(job['target_clips'])], 
             config=types.GenerateContentConfig(response_mime_type='application/json')
         )
         
@@ -412,40 +822,44 @@ def _analyze_smart_context(video_path, duration):
         parsed = json.loads(response.text)
         if not parsed:
             print("⚠️ Gemini mengembalikan list kosong []")
-            return None
-            
-        return parsed
-        
+        else:
+            gemini_cache.set_result(job['digest'], PROMPT_VERSION, job['target_clips'], parsed)
     except Exception as e:
         print(f"❌ Gemini Error Exception: {e}")
-        return None
+    job['done'] = True
+    return job
+
+def _collect_candidates(jobs):
+    """Gabungkan hasil semua job: rebase ke timeline source, dedup sambungan window, ranking global."""
+    results = [(job, gemini_cache.get_result(job['digest'], PROMPT_VERSION, job['target_clips'])) for job in jobs]
+    results = [(job, r) for job, r in results if r]
+    if len(jobs) == 1:
+        return results[0][1] if results else None
+
+    merged = []
+    for job, result in results:
+        for c in result:
+            s = job['start'] + _time_to_seconds(c.get('start_time', '00:00'))
+            e = job['start'] + _time_to_seconds(c.get('end_time', '00:00'))
+            merged.append({**c, 'start': s, 'end': min(e, job['end'])})
+
+    duration = max(job['end'] for job in jobs)
+    total_clips = max(3, min(config.ANALYSIS_MAX_CLIPS, math.ceil(duration / 120)))
+    ranked = windows.merge_candidates(merged, total_clips)
+    return [
+        {
+            'start_time': windows.seconds_to_timestamp(c['start']),
+            'end_time': windows.seconds_to_timestamp(c['end']),
+            'title': c.get('title', 'Untitled'),
+            'caption': c.get('caption', ''),
+            'score': c.get('score', 85),
+        }
+        for c in ranked
+    ]
 
 def _create_srt(text, duration, output_path):
     with open(output_path, "w", encoding='utf-8') as f: f.write(f"1\n00:00:00,000 --> 00:00:05,000\n{text}")
 
-def _scan_face_average(video_path):
-    cap = cv2.VideoCapture(video_path); mp_face = mp.solutions.face_detection; detected_positions = []
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)); step = max(1, int(total_frames / 10))
-    with mp_face.FaceDetection(model_selection=1, min_detection_confidence=0.4) as face_det:
-        for i in range(0, total_frames, step):
-            cap.set(cv2.CAP_PROP_POS_FRAMES, i); success, img = cap.read()
-            if not success: continue
-            results = face_det.process(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
-            if results.detections:
-                bbox = results.detections[0].location_data.relative_bounding_box
-                center_x = bbox.xmin + (bbox.width / 2)
-                detected_positions.append(center_x * cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    cap.release()
-    return sum(detected_positions)/len(detected_positions) if detected_positions else 0.5 * cap.get(cv2.CAP_PROP_FRAME_WIDTH)
-
-def _download_video_with_meta(url, output_folder):
-    ydl_opts = {'format': 'bestvideo[height<=1080][ext=mp4][vcodec^=avc1]+bestaudio[ext=m4a]/best[ext=mp4]/best', 'outtmpl': f'{output_folder}/source.%(ext)s', 'quiet': True, 'no_warnings': True, 'nocheckcertificate': True, 'socket_timeout': 30,}
-    try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            return f"{output_folder}/source.mp4", info.get('duration', 0)
-    except: return None, 0
-
 def _time_to_seconds(time_str):
     try:
         parts = list(map(int, time_str.split(':')))
@@ -454,10 +868,120 @@ def _time_to_seconds(time_str):
     except: return 0
     return 0
 
+@celery_app.task
+def build_face_track_task(source_dir: str):
+    """Face track low-fps + cut shot seluruh source (satu decode, sekali per source, dipicu setelah download)."""
+    try:
+        media_path = sources.local_media_path(source_dir)
+        if not media_path: raise Exception("Source video missing.")
+        faces.build_face_track(source_dir, media_path)
+        return {"status": "completed"}
+    except Exception as e:
+        print(f"❌ Face Track Error: {e}")
+        return {"status": "failed", "error": str(e)}
+
+@celery_app.task
+def build_keyframe_index_task(media_path: str):
+    """Tahap pipeline: index keyframe file source (sekali per file, dipicu setelah download)."""
+    started = time.time()
+    try:
+        keyframes.build_index(media_path)
+        stats = keyframes.load_stats(media_path) or {}
+        elapsed = round(time.time() - started, 2)
+        print(f"⏱️ [Keyframe Index] {media_path}: {elapsed}s")
+        return {"status": "completed", "seconds": elapsed, **stats}
+    except Exception as e:
+        print(f"❌ Keyframe Index Error: {e}")
+        return {"status": "failed", "error": str(e)}
+
+@celery_app.task(bind=True)
+def export_horizontal_task(self, candidate_id: int):
+    """
+    Export window kandidat dalam aspek asli (tanpa crop & subtitle) lewat stream-copy:
+    tidak ada encode, mulai dari keyframe terdekat sebelum start kandidat.
+    """
+    print(f"📤 [Export Horizontal] Candidate ID: {candidate_id}")
+    db = SessionLocal()
+    try:
+        candidate = db.query(ClipCandidate).filter(ClipCandidate.id == candidate_id).first()
+        if not candidate: raise Exception("Candidate not found")
+
+        source_dir = source_store.source_dir_for(candidate.project)
+        window = sources.resolve_window(source_dir, candidate.project.youtube_url, candidate.start_time, candidate.end_time)
+        output_path = f"downloads/{candidate.project_id}/horizontal_{candidate.id}.mp4"
+        result = render.copy_window(window['path'], window['start'], window['end'], output_path)
+
+        # Pre-roll karena mulai dari keyframe: waktu kandidat relatif ke file export
+        preroll = window['start'] - result['start']
+        print(f"   ✅ Export stream-copy: {output_path} (pre-roll {preroll:.2f}s)")
+        return {"status": "completed", "path": output_path, "preroll": round(preroll, 3)}
+    except Exception as e:
+        print(f"❌ Export Error: {e}")
+        return {"status": "failed", "error": str(e)}
+    finally:
+        db.close()
+
+@celery_app.task(bind=True)
+def render_variant_task(self, clip_id: int, platform: str):
+    """Varian platform untuk klip yang sudah dirender (diminta per klip, mis. sebelum publish)."""
+    print(f"📐 [Render Variant] Clip ID: {clip_id} -> {platform}")
+    db = SessionLocal()
+    try:
+        clip = db.query(GeneratedClip).filter(GeneratedClip.id == clip_id).first()
+        if not clip: raise Exception("Clip not found")
+        if platform not in render.PROFILES: raise Exception(f"Unknown platform: {platform}")
+
+        existing = db.query(GeneratedClip).filter(
+            GeneratedClip.parent_clip_id == clip.id,
+            GeneratedClip.platform == platform
+        ).first()
+        if existing and os.path.exists(existing.file_path):
+            return {"status": "completed", "clip_id": existing.id, "path": existing.file_path}
+
+        output_path = f"{os.path.splitext(clip.file_path)[0]}_{platform}.mp4"
+        try:
+            render.encode_variant(clip.file_path, output_path, platform)
+        except subprocess.CalledProcessError as e:
+            raise Exception(f"FFmpeg Gagal (variant): {e.stderr.decode('utf8')}")
+
+        variant = existing or GeneratedClip(
+            project_id=clip.project_id,
+            title=clip.title,
+            credits_used=0,
+            platform=platform,
+            parent_clip_id=clip.id
+        )
+        variant.file_path = output_path
+        db.add(variant)
+        db.commit()
+        print(f"   ✅ Varian {platform}: {output_path}")
+        return {"status": "completed", "clip_id": variant.id, "path": output_path}
+    except Exception as e:
+        print(f"❌ Variant Error: {e}")
+        db.rollback()
+        return {"status": "failed", "error": str(e)}
+    finally:
+        db.close()
+
+@celery_app.task
+def cleanup_sources_task():
+    """Hapus source di store yang sudah tidak direferensikan Project mana pun."""
+    db = SessionLocal()
+    try:
+        removed = source_store.cleanup_unreferenced(db)
+        print(f"🧹 Source store cleanup: {len(removed)} source dihapus")
+        return {"removed": removed}
+    finally:
+        db.close()
+
 # --- SCHEDULE ---
 celery_app.conf.beat_schedule = {
     'check-youtube-every-hour': {
         'task': 'app.tasks.watcher.run_watcher_task', 
         'schedule': crontab(minute=0), 
     },
+    'cleanup-source-store-daily': {
+        'task': 'app.tasks.pipeline.cleanup_sources_task',
+        'schedule': crontab(minute=30, hour=3),
+    },
 }
\ No newline at end of file
@@ -0,0 +1,211 @@
+"""
+Task untuk worker transkripsi.
+
+Jalankan worker khusus per queue:
+    celery -A app.tasks.pipeline worker -Q transcribe --concurrency=1
+    celery -A app.tasks.pipeline worker -Q transcribe_interactive --concurrency=1
+dengan WHISPER_PRELOAD=1, supaya model di-load sekali per proses saat start
+(worker_process_init), bukan di task pertama. Queue "transcribe" untuk
+transkripsi full-source (lama), "transcribe_interactive" untuk batch kandidat
+editor supaya tidak antri di belakangnya.
+"""
+import fcntl
+import redis
+from celery.signals import worker_process_init
+
+from app.core import config
+from app.db.database import SessionLocal
+from app.db.models import ClipCandidate
+from app.services import audio, sources, source_store, transcript, transcription
+from app.tasks.pipeline import celery_app
+
+PENDING_KEY = "transcribe:pending"
+SCHEDULED_KEY = "transcribe:batch_scheduled"
+ATTEMPTS_KEY = "transcribe:attempts"
+
+_redis_client = None
+
+
+def _redis():
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(config.REDIS_URL)
+    return _redis_client
+
+
+@worker_process_init.connect
+def preload_whisper_model(**kwargs):
+    if config.WHISPER_PRELOAD:
+        transcription.load_model()
+
+
+@celery_app.task
+def transcribe_source_task(source_dir: str):
+    """
+    Transkrip word-level seluruh source, sekali per source (dipicu setelah download).
+    Error di-raise (task FAILURE) supaya chain render di belakangnya berhenti,
+    bukan merender subtitle placeholder dan memotong kredit.
+    """
+    try:
+        words = ensure_source_transcript(source_dir)
+        return {"status": "completed", "words": len(words)}
+    except Exception as e:
+        print(f"❌ Source Transcript Error: {e}")
+        raise
+
+
+@celery_app.task
+def transcriber_stats_task():
+    """Load time & memori model di proses worker yang mengeksekusi task ini."""
+    return transcription.stats()
+
+
+def ensure_source_transcript(source_dir):
+    """
+    Load transcript.json milik source, atau jalankan Whisper untuk seluruh source.
+    Dikunci per source: worker lain yang butuh transkrip yang sama menunggu, bukan ikut transkripsi.
+    """
+    words = transcript.load(source_dir)
+    if words is not None:
+        return words
+
+    with open(f"{source_dir}/.transcript.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            words = transcript.load(source_dir)
+            if words is not None:
+                return words
+
+            media_path = sources.local_media_path(source_dir)
+            if not media_path: raise Exception("Source video missing.")
+
+            audio.ensure_pcm_cache(source_dir, media_path)
+            pcm = audio.open_pcm(source_dir)
+
+            # Transkripsi per chunk dari memmap supaya memori tidak ikut membengkak untuk source berjam-jam
+            print(f"   🎤 Transkripsi seluruh source ({source_dir}, {len(pcm) / audio.SAMPLE_RATE:.0f}s)...")
+            words = []
+            for lo, hi in audio.chunk_bounds(pcm):
+                offset = lo / audio.SAMPLE_RATE
+                for w in transcription.transcribe_batch([audio.to_float(pcm[lo:hi])], config.TRANSCRIBE_BATCH_GAP_SECONDS)[0]:
+                    words.append({'start': round(w['start'] + offset, 3), 'end': round(w['end'] + offset, 3), 'word': w['word']})
+
+            transcript.save(source_dir, words)
+            return words
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def enqueue_candidate(candidate_id):
+    """
+    Masukkan kandidat ke antrian batch. Batch dijadwalkan sekali per jendela linger,
+    jadi request editor yang datang berdekatan (lintas project juga) ikut satu pass model.
+    """
+    client = _redis()
+    client.rpush(PENDING_KEY, candidate_id)
+    if client.set(SCHEDULED_KEY, 1, nx=True, ex=int(config.TRANSCRIBE_BATCH_LINGER_SECONDS) + 60):
+        transcribe_batch_task.apply_async(countdown=config.TRANSCRIBE_BATCH_LINGER_SECONDS)
+
+
+def _pop_pending():
+    client = _redis()
+    client.delete(SCHEDULED_KEY)
+    with client.pipeline() as pipe:
+        pipe.lrange(PENDING_KEY, 0, -1)
+        pipe.delete(PENDING_KEY)
+        raw_ids, _ = pipe.execute()
+    return sorted({int(x) for x in raw_ids})
+
+
+def _requeue(candidate_ids):
+    """
+    Kembalikan kandidat yang belum selesai ke antrian (batch gagal di tengah).
+    Tiap kandidat dicoba maks TRANSCRIBE_BATCH_MAX_ATTEMPTS kali, setelah itu dilepas.
+    """
+    client = _redis()
+    retry = []
+    for cid in candidate_ids:
+        attempts = client.hincrby(ATTEMPTS_KEY, cid, 1)
+        if attempts < config.TRANSCRIBE_BATCH_MAX_ATTEMPTS:
+            retry.append(cid)
+        else:
+            client.hdel(ATTEMPTS_KEY, cid)
+            print(f"   ⚠️ Transkripsi Candidate #{cid} gagal {attempts}x, dilepas dari antrian")
+    for cid in retry:
+        enqueue_candidate(cid)
+    return retry
+
+
+@celery_app.task
+def transcribe_batch_task():
+    """
+    Ambil semua kandidat yang antri dan tulis kata-kata window-nya ke
+    ClipCandidate.transcript_data masing-masing. Kalau transcript.json source
+    sudah ada, cukup di-slice; sisanya ditranskripsi dengan batched inference
+    (maks TRANSCRIBE_BATCH_MAX_SECONDS audio per pass, tiap clip di-decode
+    independen jadi teks tidak terbawa dari klip lain).
+    """
+    candidate_ids = _pop_pending()
+    if not candidate_ids:
+        return {"status": "empty"}
+
+    db = SessionLocal()
+    remaining = set()
+    try:
+        candidates = db.query(ClipCandidate).filter(ClipCandidate.id.in_(candidate_ids)).all()
+        remaining = {c.id for c in candidates}
+        source_words, sliced, items = {}, [], []
+        for c in candidates:
+            if c.transcript_data is not None:
+                remaining.discard(c.id)
+                continue
+            source_dir = source_store.source_dir_for(c.project)
+            if source_dir not in source_words:
+                source_words[source_dir] = transcript.load(source_dir)
+
+            if source_words[source_dir] is not None:
+                c.transcript_data = transcript.slice_words(source_words[source_dir], c.start_time, c.end_time)
+                sliced.append(c)
+                continue
+            media_path = sources.local_media_path(source_dir)
+            if not media_path:
+                print(f"   ⚠️ Source hilang untuk Candidate #{c.id}, skip")
+                remaining.discard(c.id)
+                continue
+            audio.ensure_pcm_cache(source_dir, media_path)
+            pcm = audio.open_pcm(source_dir)
+            items.append((c, audio.to_float(audio.slice_pcm(pcm, c.start_time, c.end_time))))
+        _finish(db, sliced, remaining)
+        done = len(sliced)
+
+        print(f"   🎤 Batch transkripsi {len(items)} kandidat...")
+        batch, batch_seconds = [], 0.0
+        for c, pcm in items + [(None, None)]:
+            seconds = len(pcm) / transcription.SAMPLE_RATE if pcm is not None else 0
+            if batch and (c is None or batch_seconds + seconds > config.TRANSCRIBE_BATCH_MAX_SECONDS):
+                results = transcription.transcribe_batch([a for _, a in batch], config.TRANSCRIBE_BATCH_GAP_SECONDS)
+                for (bc, _), words in zip(batch, results):
+                    bc.transcript_data = words
+                # Commit per pass: kalau pass berikutnya gagal, yang sudah jadi tidak hilang
+                _finish(db, [bc for bc, _ in batch], remaining)
+                done += len(batch)
+                batch, batch_seconds = [], 0.0
+            if c is not None:
+                batch.append((c, pcm))
+                batch_seconds += seconds
+
+        return {"status": "completed", "candidates": done}
+    except Exception as e:
+        print(f"❌ Batch Transcript Error: {e}")
+        db.rollback()
+        retry = _requeue(sorted(remaining))
+        return {"status": "failed", "error": str(e), "requeued": retry}
+    finally:
+        db.close()
+
+
+def _finish(db, candidates, remaining):
+    db.commit()
+    for c in candidates:
+        remaining.discard(c.id)
+        _redis().hdel(ATTEMPTS_KEY, c.id)
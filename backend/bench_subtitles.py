@@ -0,0 +1,69 @@
+import os
+import sys
+import json
+import time
+import random
+import subprocess
+
+from app.services import subtitles, render
+
+# Transkrip kata [{start, end, word}] (mis. downloads/sources/<key>/transcript.json),
+# kalau tidak ada pakai kata sintetis ~2.5 kata/detik
+TRANSCRIPT_PATH = sys.argv[1] if len(sys.argv) > 1 else None
+CLIP_SECONDS = [60, 180, 300]
+OUTPUT_FOLDER = "downloads/bench_subtitles"
+RUNS = 3
+
+
+def synthetic_words(duration, rate=2.5):
+    words, t = [], 0.0
+    vocab = "kita coba bahas ini dulu ya karena penting banget buat kalian semua.".split()
+    while t < duration:
+        length = random.uniform(0.15, 0.5)
+        words.append({'start': round(t, 3), 'end': round(t + length, 3), 'word': random.choice(vocab)})
+        t += length + random.uniform(0.02, 0.3) + (random.random() < 0.05) * 1.0
+    return words
+
+
+def load_words(duration):
+    if not TRANSCRIPT_PATH:
+        return synthetic_words(duration)
+    with open(TRANSCRIPT_PATH) as f:
+        words = json.load(f)
+    return [w for w in words if w['end'] <= duration]
+
+
+def render_cost(duration, sub_filter):
+    """Waktu wall-clock render kanvas 9:16 hitam + subtitle ke null muxer (tanpa encode)."""
+    chain = "format=yuv420p" if sub_filter is None else f"{sub_filter},format=yuv420p"
+    command = ['ffmpeg', '-v', 'error', '-nostdin', '-f', 'lavfi', '-i', f"color=black:s=1080x1920:r=30:d={duration}",
+               '-vf', chain, '-f', 'null', '-']
+    timings = []
+    for _ in range(RUNS):
+        started = time.time()
+        subprocess.run(command, check=True)
+        timings.append(time.time() - started)
+    return min(timings)
+
+
+def run_benchmark():
+    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+    print(f"{'Durasi':>8}{'Kata':>8}{'SRT cue':>10}{'ASS event':>11}{'Base (s)':>10}{'SRT (s)':>10}{'ASS (s)':>10}")
+    print("-" * 67)
+    for duration in CLIP_SECONDS:
+        words = load_words(duration)
+        srt_path = f"{OUTPUT_FOLDER}/clip_{duration}.srt"
+        ass_path = f"{OUTPUT_FOLDER}/clip_{duration}.ass"
+        cues = subtitles.write_srt_one_word(words, srt_path)
+        events = subtitles.write_ass(words, ass_path)
+
+        base = render_cost(duration, None)
+        srt = render_cost(duration, render.subtitle_filter(srt_path))
+        ass = render_cost(duration, render.subtitle_filter(ass_path))
+        print(f"{duration:>7}s{len(words):>8}{cues:>10}{events:>11}{base:>10.2f}{srt:>10.2f}{ass:>10.2f}")
+
+    print("\nBiaya libass = kolom SRT/ASS dikurangi Base (decode + format tanpa subtitle).")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,95 @@
+import sys
+import time
+import difflib
+import statistics
+import numpy as np
+
+from app.core import config
+from app.services import audio
+from app.services.transcription import ENGINES
+
+# Video lokal untuk benchmark (hasil test_download.py atau source.mp4 di downloads/sources)
+VIDEO_PATH = sys.argv[1] if len(sys.argv) > 1 else "downloads/jNQXAC9IVRw.mp4"
+CLIP_SECONDS = 30
+MAX_CLIPS = 5
+
+
+def pick_clips(pcm):
+    """Ambil beberapa potongan merata sepanjang video (klip yang sama untuk semua engine)."""
+    total = len(pcm) / audio.SAMPLE_RATE
+    count = max(1, min(MAX_CLIPS, int(total // CLIP_SECONDS)))
+    step = total / count
+    return [(i * step, min(total, i * step + CLIP_SECONDS)) for i in range(count)]
+
+
+def normalize(word):
+    return "".join(ch for ch in word.lower() if ch.isalnum())
+
+
+def timestamp_drift(reference, candidate):
+    """Selisih |start| kata yang sama (di-align via difflib) antara dua engine."""
+    ref_tokens = [normalize(w['word']) for w in reference]
+    cand_tokens = [normalize(w['word']) for w in candidate]
+    matcher = difflib.SequenceMatcher(a=ref_tokens, b=cand_tokens, autojunk=False)
+
+    drifts = []
+    for block in matcher.get_matching_blocks():
+        for k in range(block.size):
+            drifts.append(abs(reference[block.a + k]['start'] - candidate[block.b + k]['start']))
+    return drifts, (len(drifts) / len(ref_tokens) if ref_tokens else 0)
+
+
+def run_benchmark():
+    print(f"🎧 Decode audio dari: {VIDEO_PATH}")
+    pcm = audio.load_pcm(VIDEO_PATH)
+    clips = pick_clips(pcm)
+    print(f"✂️  {len(clips)} klip x {CLIP_SECONDS}s")
+
+    results = {}
+    for name, engine_cls in ENGINES.items():
+        try:
+            engine = engine_cls().load()
+        except Exception as e:
+            print(f"⚠️ Engine {name} tidak tersedia: {e}")
+            continue
+
+        words, elapsed, audio_seconds = [], 0.0, 0.0
+        for start, end in clips:
+            samples = pcm[int(start * audio.SAMPLE_RATE):int(end * audio.SAMPLE_RATE)].astype(np.float32)
+            t0 = time.time()
+            words.append(engine.transcribe(samples))
+            elapsed += time.time() - t0
+            audio_seconds += end - start
+
+        results[name] = {'words': words, 'rtf': elapsed / audio_seconds, 'stats': engine.stats}
+
+    print("\n" + "=" * 70)
+    print(f"{'Engine':<16}{'Threads':>8}{'Beam':>6}{'Load (s)':>10}{'+RSS (MB)':>12}{'RTF':>10}{'Kata':>8}")
+    print("-" * 70)
+    for name, r in results.items():
+        total_words = sum(len(w) for w in r['words'])
+        print(f"{name:<16}{r['stats']['threads']:>8}{config.TRANSCRIBE_BEAM_SIZE:>6}{r['stats']['load_seconds']:>10}{r['stats']['model_rss_mb']:>12}{r['rtf']:>10.3f}{total_words:>8}")
+
+    # Drift timestamp terhadap engine referensi (openai-whisper)
+    reference = results.get("whisper")
+    if not reference:
+        return
+    print("\n⏱️ Drift timestamp kata vs whisper:")
+    for name, r in results.items():
+        if name == "whisper":
+            continue
+        drifts, coverage = [], []
+        for ref_words, cand_words in zip(reference['words'], r['words']):
+            d, c = timestamp_drift(ref_words, cand_words)
+            drifts.extend(d)
+            coverage.append(c)
+        if not drifts:
+            print(f"   {name}: tidak ada kata yang cocok")
+            continue
+        drifts.sort()
+        p95 = drifts[int(0.95 * (len(drifts) - 1))]
+        print(f"   {name}: mean {statistics.mean(drifts) * 1000:.0f}ms | median {statistics.median(drifts) * 1000:.0f}ms | p95 {p95 * 1000:.0f}ms | kata cocok {statistics.mean(coverage) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -89,12 +89,14 @@ export default function EditorPage() {
       // Poll for completion
       const pollInterval = setInterval(async () => {
         const res = await api.get(`/api/v1/videos/candidates/${candidateId}`)
-        if (res.data.draft_video_path && res.data.transcript_data) {
+        // Preview 360p sudah cukup untuk membuka editor; draft full-quality menyusul
+        const draftPath = res.data.draft_video_path || res.data.preview_video_path
+        if (draftPath && res.data.transcript_data) {
           setCandidate(res.data)
           setTranscript(res.data.transcript_data)
           setPreparing(false)
           clearInterval(pollInterval)
-          initWaveform(res.data.draft_video_path)
+          initWaveform(draftPath)
         }
       }, 3000)
       
@@ -243,11 +245,12 @@ export default function EditorPage() {
     )
   }
 
-  const videoUrl = candidate?.draft_video_path
-    ? `${process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000"}/${candidate.draft_video_path}`
+  const draftPath = candidate?.draft_video_path || candidate?.preview_video_path
+  const videoUrl = draftPath
+    ? `${process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000"}/${draftPath}`
     : ""
 
-  const needsPreparation = !candidate?.draft_video_path || !candidate?.transcript_data
+  const needsPreparation = !draftPath || !candidate?.transcript_data
 
   return (
     <div className="min-h-screen bg-neutral-950 text-white flex flex-col">
@@ -10,6 +10,8 @@ interface ClipCandidate {
   viral_score: number
   is_rendered: boolean
   draft_video_path: string | null
+  preview_video_path: string | null
+  draft_status: string | null
   transcript_data: Array<{ start: number; end: number; word: string }> | null
 }
 